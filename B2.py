@@ -4,22 +4,49 @@ redfin_scraper_plus.py • 2025-08-07
 Outputs:
     address, price, lotSize, yearBuilt, livingArea, bedrooms, bathrooms
 to house_details_redfin.csv
+(+ .done resume index and .failed.csv retry list – see redfin_progress.py)
 """
 
-import csv, html, os, random, re, time
-from datetime import datetime
-from selenium import webdriver
+import argparse, re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.common.action_chains import ActionChains   # add at top
+
+from redfin_pool import run_pool
+from redfin_pipeline import run_pipeline
+from redfin_progress import ProgressIndex
+from redfin_writer import POLICIES, DurableWriter, close_run, repair_tail
+from redfin_store import ResultStore
+from redfin_address import AddressIndex
+from redfin_input import parse_shard, read_addresses, shard_filter
+from redfin_cache import URLCache
+from redfin_ratelimit import AdaptiveRateLimiter
+from redfin_trace import TRACE
+from redfin_session import SESSION
+from redfin_supervisor import DriverSupervisor
+from redfin_retry import RetryQueue
+from redfin_tiers import LADDER
+from redfin_archive import PageArchive
+from redfin_extract import cell, extract, lot_acres, public_facts
+from redfin_browser import (PRICE_CSS, WAITS, RoundTripCounter, forget_harvest,
+                            harvest, last_harvest, page_head_text, page_record,
+                            set_ready_timeouts,
+                            wait_for, wait_usable)
+
+BASE_URL    = "https://www.redfin.com"   # --base-url → local fixture_server.py
+PAUSE_RANGE = (4, 8)                     # old fixed pause → starting rate for the limiter
+URL_CACHE   = None                       # redfin_cache.URLCache, set up in main()
+JS_HARVEST  = False                      # --js-harvest: price + Public facts in one JS call
+ARCHIVE     = None                       # redfin_archive.PageArchive (--archive)
 
 
 # ───────────────────────── helpers ──────────────────────────
 def handle_cookie_banner(driver):
+    if SESSION.banner_done(driver):     # consent already given in this browser / profile
+        return
     try:
         btn = WebDriverWait(driver, 5).until(
             EC.element_to_be_clickable((
@@ -27,13 +54,21 @@ def handle_cookie_banner(driver):
                 "//*[contains(text(),'Accept all cookies')]"
                 " | //button[contains(text(),'Accept')]")))
         driver.execute_script("arguments[0].click();", btn)
-        time.sleep(1)
+        wait_for(driver, "cookie", EC.invisibility_of_element(btn), replaces=1)
+        SESSION.banner_seen(driver, True)
     except TimeoutException:
-        pass
+        SESSION.banner_seen(driver, False)
 
 
+@TRACE.timed("visible_price")
 def _visible_price(driver, secs=7):
-    css = "[data-testid='avm-price'] .value, .statsValue.price"
+    if JS_HARVEST:      # one execute_script instead of wait + text + parent attr
+        h = harvest(driver, secs)
+        if not h["price"]:
+            return None
+        return ("Redfin Estimate" if "avm-price" in h["testid"] else "List Price"), h["price"]
+
+    css = PRICE_CSS
     try:
         el = WebDriverWait(driver, secs).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, css)))
@@ -46,14 +81,13 @@ def _visible_price(driver, secs=7):
         return None
 
 
+@TRACE.timed("parse")
 def _regex_price(src):
-    m = re.search(r'"avmText":"([^"]*?\$[0-9,]+)', src)
-    if m:
-        return "Redfin Estimate", re.search(r'\$[0-9,]+', html.unescape(m.group(1))).group(0)
-    m = re.search(r'"segments":\s*```math.*?"text":"[^"]*?FOR \$([0-9,]+)', src, re.DOTALL)
-    if m:
-        return "Sold Price", f"${m.group(1)}"
-    return None
+    return _rec_price(extract(src))
+
+
+def _rec_price(rec):
+    return (rec["priceLabel"], rec["price"]) if rec["price"] else None
 
 
 ###############################################################################
@@ -69,8 +103,7 @@ def _from_property_details(driver):
         # Jump to property-details section so it’s definitely in DOM/viewport
         hdr = driver.find_element(By.XPATH,
             "//h2[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'property details')]")
-        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", hdr)
-        time.sleep(0.3)
+        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", hdr)   # synchronous
     except NoSuchElementException:
         return out     # Section not on page
 
@@ -80,7 +113,8 @@ def _from_property_details(driver):
             "//div[contains(@data-rf-test-id,'public-facts')]//button[contains(@class,'AccordionItem')]")
         if caret.get_attribute("aria-expanded") == "false":
             driver.execute_script("arguments[0].click();", caret)
-            time.sleep(0.2)
+            wait_for(driver, "details",
+                     lambda d: caret.get_attribute("aria-expanded") == "true", replaces=0.2)
     except NoSuchElementException:
         pass   # already expanded (older layout) or missing
 
@@ -101,64 +135,37 @@ def _from_property_details(driver):
 
     return out
 ###############################################################################
-def _parse_extras(driver, src):
+
+
+def _parse_extras(driver, src, pf_txt=None, rec=None):
     """
     Returns a dict with:
         lotSize (float, acres) | yearBuilt (int) | livingArea (int, sqft)
         bedrooms (int) | bathrooms (float)
-    Pull from page JSON first; whatever is still missing comes from
-    the Public-facts accordion.
+    Pull from page JSON first (redfin_extract); whatever is still missing
+    comes from the Public-facts accordion – read live from `driver`, or
+    from `pf_txt` already collected by fetch() (both None → skipped).
+    `rec` is fetch()'s extract() of `src`, if it has one already.
     """
-    d = {"lotSize": None, "yearBuilt": None, "livingArea": None,
-         "bedrooms": None, "bathrooms": None}
-
-    # ── 1️⃣  quick JSON grabs ───────────────────────────────────────────────
-    m = re.search(r'"sqFt"\s*:\s*([0-9,]+)', src)
-    if m: d["livingArea"] = int(m.group(1).replace(",", ""))
-
-    m = re.search(r'"lotSize[A-Za-z]*"\s*:\s*([0-9,\.]+)', src)
-    if m: d["lotSize"] = float(m.group(1).replace(",", ""))
-
-    m = re.search(r'"yearBuilt"\s*:\s*([0-9]{4})', src)
-    if m: d["yearBuilt"] = int(m.group(1))
-
-    m = re.search(r'"beds"\s*:\s*([0-9]+)', src)
-    if m: d["bedrooms"] = int(m.group(1))
-
-    m = re.search(r'"baths"\s*:\s*([0-9\.]+)', src)
-    if m: d["bathrooms"] = float(m.group(1))
-
-    # ── 2️⃣  anything still None? → scrape “Public facts” bullets ───────────
-    if any(v is None for v in d.values()):
+    if rec is None:
+        with TRACE.span("parse"):
+            rec = extract(src)
+    d = {"lotSize":    lot_acres(rec, 3),
+         "yearBuilt":  rec["yearBuilt"],
+         "livingArea": rec["livingArea"],
+         "bedrooms":   rec["beds"],
+         "bathrooms":  rec["baths"]}
+
+    # ── anything still None? → scrape “Public facts” bullets ───────────────
+    if pf_txt is None and driver is not None and any(v is None for v in d.values()):
         pf_txt = _public_facts_text(driver)
+    return public_facts(d, pf_txt)      # shared with reparse.py
 
-        if d["lotSize"] is None:
-            m = re.search(r'Lot Size\s*[:\-]?\s*([0-9,\.]+)\s*(acres|square feet)?', pf_txt, re.I)
-            if m:
-                num  = float(m.group(1).replace(",", ""))
-                unit = (m.group(2) or "").strip().lower()  # None → "" → "acres" or "square feet" or ""
-                if unit == "square feet":
-                    d["lotSize"] = round(num / 43560, 3)
-                else:
-                    d["lotSize"] = num
-
-        if d["yearBuilt"] is None:
-            m = re.search(r'Year Built\s*[:\-]?\s*([0-9]{4})', pf_txt, re.I)
-            if m: d["yearBuilt"] = int(m.group(1))
-
-        if d["livingArea"] is None:
-            m = re.search(r'Sq\.?\s*Ft\.?\s*[:\-]?\s*([0-9,]+)', pf_txt, re.I)
-            if m: d["livingArea"] = int(m.group(1).replace(",", ""))
-
-        if d["bedrooms"] is None:
-            m = re.search(r'Beds?\s*[:\-]?\s*([0-9]+)', pf_txt, re.I)
-            if m: d["bedrooms"] = int(m.group(1))
-
-        if d["bathrooms"] is None:
-            m = re.search(r'Baths?\s*[:\-]?\s*([0-9\.]+)', pf_txt, re.I)
-            if m: d["bathrooms"] = float(m.group(1))
 
-    return d
+def _facts_missing(rec):
+    """Did extract() leave this home short of a fact? (→ read Public facts)"""
+    return lot_acres(rec) is None or any(
+        rec[k] is None for k in ("yearBuilt", "livingArea", "beds", "baths"))
 
 
 def _digits(txt):
@@ -166,61 +173,134 @@ def _digits(txt):
 
 
 # ───────────────────── core scrape routine ─────────────────────
-def scrape(driver, address):
+def _search_price(driver, address, seen):
+    """Homepage search box → price ladder. Returns (label, '$…') or None.
+    `seen` is fetch()'s page memo (page_source / page_record)."""
     wait = WebDriverWait(driver, 15)
 
-    driver.get("https://www.redfin.com")
-    handle_cookie_banner(driver)
-    box = wait.until(EC.presence_of_element_located((By.ID, "search-box-input")))
-    box.clear(); box.send_keys(address); box.send_keys(Keys.ENTER)
-    wait.until(EC.presence_of_element_located((By.TAG_NAME, "body"))); time.sleep(3)
-
-    price_pair = _visible_price(driver) or _regex_price(driver.page_source)
-
-    if not price_pair:  # secondary enter
+    with TRACE.span("homepage"):
+        box = SESSION.search_box(driver, BASE_URL)      # --warm-session: header box in place
+        if box is None:
+            driver.get(BASE_URL)
+            handle_cookie_banner(driver)
+    with TRACE.span("search"):
+        box = box or wait.until(EC.presence_of_element_located((By.ID, "search-box-input")))
+        home = driver.current_url
+        box.clear(); box.send_keys(address); box.send_keys(Keys.ENTER)
+        wait_usable(driver, "search", replaces=3, old_url=home)
+
+    landing = driver.current_url
+    cls     = LADDER.classify(driver)
+
+    def on_landing():               # a results page never grows a price widget
+        return (_visible_price(driver, 7 if cls == "home" else 1)
+                or _rec_price(page_record(driver, seen)))
+
+    def second_enter():
         try:
-            cur = driver.current_url
-            box2 = wait.until(EC.presence_of_element_located((By.ID, "search-box-input")))
-            driver.execute_script("arguments[0].focus();", box2)
-            box2.send_keys(Keys.END); box2.send_keys(Keys.ENTER)
-            WebDriverWait(driver, 10).until(EC.url_changes(cur)); time.sleep(3)
-            price_pair = _visible_price(driver, 5) or _regex_price(driver.page_source)
+            with TRACE.span("second_enter"):
+                if driver.current_url != landing:       # sold tier ran first
+                    driver.get(landing)
+                cur = driver.current_url
+                box2 = wait.until(EC.presence_of_element_located((By.ID, "search-box-input")))
+                driver.execute_script("arguments[0].focus();", box2)
+                box2.send_keys(Keys.END); box2.send_keys(Keys.ENTER)
+                WebDriverWait(driver, 10).until(EC.url_changes(cur))
+                wait_usable(driver, "second_enter", replaces=3)
+            return _visible_price(driver, 5) or _rec_price(page_record(driver, seen))
         except TimeoutException:
-            pass
+            return None
 
-    if not price_pair:  # sold filter
-        cur = driver.current_url
-        sold_url = cur + (",include=sold" if "/filter/" in cur else "/filter/include=sold")
-        driver.get(sold_url); time.sleep(5)
-        price_pair = _visible_price(driver, 5) or _regex_price(driver.page_source)
+    def sold():
+        with TRACE.span("sold"):
+            cur = landing.split("?")[0]
+            sold_url = cur + (",include=sold" if "/filter/" in cur else "/filter/include=sold")
+            driver.get(sold_url)
+            wait_usable(driver, "sold", replaces=5)
+        return _visible_price(driver, 5) or _rec_price(page_record(driver, seen))
 
-    price_clean = _digits(price_pair[1]) if price_pair else ""
-    html_src = driver.page_source
-    extras = _parse_extras(driver, html_src)
+    # order learned per landing class (redfin_tiers) instead of a fixed ladder
+    tier, price_pair = LADDER.climb(cls, {"search": on_landing,
+                                          "second_enter": second_enter, "sold": sold})
+    if price_pair:
+        TRACE.tier(tier)
+    return price_pair
 
-    # Optional debug dump:
-    # with open("html.txt", "w", encoding="utf-8") as f: f.write(html_src)
 
+def fetch(driver, address):
+    """
+    Browser half of scrape(): price + the page's extract() record (+ Public-
+    facts text when the record is short of a fact). Every page is decoded
+    once – the price tiers and the facts share the record. Returns a
+    picklable dict for parse_fetched(), which only fills the gaps and
+    formats the row.
+    """
+    price_pair = None
+    seen = {}           # page_source pulled and decoded once per URL
+    forget_harvest(driver)
+    TRACE.take_tier()
+
+    url = URL_CACHE.get(address) if URL_CACHE else None
+    if url:             # known property page → skip homepage + search box
+        with TRACE.span("cached_page"):
+            driver.get(url)
+        price_pair = _visible_price(driver) or _rec_price(page_record(driver, seen))
+        if price_pair:
+            TRACE.tier("cache")
+        else:
+            URL_CACHE.drop(address)
+
+    if not price_pair:
+        price_pair = _search_price(driver, address, seen)
+        if price_pair and URL_CACHE:
+            URL_CACHE.put(address, driver.current_url)
+
+    rec    = page_record(driver, seen)  # keys in "similar homes" JSON don't count
+    SESSION.measure(driver)
+    pf_txt = _public_facts_text(driver) if _facts_missing(rec) else ""
+    if ARCHIVE:         # raw page for reparse.py
+        ARCHIVE.put(address, seen["src"], driver.current_url, pf_txt)
+    return {"price": price_pair, "rec": rec, "pf_txt": pf_txt,
+            "tier": TRACE.take_tier()}
+
+
+def parse_fetched(f):
+    """fetch() payload → CSV row dict. No driver needed."""
+    if "rec" not in f:                  # fetch raised – redfin_retry already classified it
+        return {"failure": f.get("failure", "error")}
+    price_clean = _digits(f["price"][1]) if f["price"] else ""
+    extras = _parse_extras(None, None, f["pf_txt"], f["rec"])
     return {
         "price":      price_clean,
-        "lotSize":    extras["lotSize"]    or "",
-        "yearBuilt":  extras["yearBuilt"]  or "",
-        "livingArea": extras["livingArea"] or "",
-        "bedrooms":   extras["bedrooms"]   or "",
-        "bathrooms":  extras["bathrooms"]  or "",
+        "lotSize":    cell(extras["lotSize"], "b2"),
+        "yearBuilt":  cell(extras["yearBuilt"], "b2"),
+        "livingArea": cell(extras["livingArea"], "b2"),
+        "bedrooms":   cell(extras["bedrooms"], "b2"),
+        "bathrooms":  cell(extras["bathrooms"], "b2"),
+        "tier":       f.get("tier", ""),
+        "failure":    f.get("failure", ""),
     }
 
+
+def scrape(driver, address):
+    return parse_fetched(fetch(driver, address))
+
 ###############################################################################
 # ─── helper: open the Public facts accordion & return raw list text ─────────#
 ###############################################################################
 ###############################################################################
 # helper: open the “Public facts” accordion & return the bullet-list text     #
 ###############################################################################
+@TRACE.timed("public_facts")
 def _public_facts_text(driver) -> str:
     """
     Scroll to ‘Property details’, expand ‘Public facts’ if needed,
     and return one big string containing all <li> bullet texts.
     """
+    if JS_HARVEST:      # bullets already came back with the price harvest
+        h = last_harvest(driver) or harvest(driver, 0)
+        return "  ".join(h["facts"])
+
     # 1️⃣  make sure the Property-details area is on screen
     try:
         h2 = driver.find_element(
@@ -271,48 +351,200 @@ def _public_facts_text(driver) -> str:
     return "  ".join(li.text for li in bullets)
     
 # ───────────────────────── runner ────────────────────────────
-def main():
-    IN_CSV, OUT_CSV = "addresses.csv", "house_details_redfin.csv"
-
+def new_driver():
     opts = Options()
     opts.add_argument("--disable-blink-features=AutomationControlled")
     opts.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36")
 
-    driver = webdriver.Chrome(options=opts); driver.maximize_window()
+    driver = SESSION.start(opts); driver.maximize_window()   # --profile / --headless / --block-heavy
+    return driver
 
-    try:
-        file_exists = os.path.exists(OUT_CSV)
-        with open(OUT_CSV, 'a', newline='', encoding='utf-8') as fo:
-            wtr = csv.writer(fo)
-            header = ["address", "price", "lotSize", "yearBuilt",
-                      "livingArea", "bedrooms", "bathrooms"]
-            if not file_exists:
-                wtr.writerow(header)
-
-            with open(IN_CSV, newline='', encoding='utf-8') as fi:
-                rdr = csv.reader(fi)
-                rows = list(rdr)
-                if rows and rows[0][0].strip().lower() == "address":
-                    rows = rows[1:]
-
-                for row in rows:
-                    if not row:
-                        continue
-                    addr = row[0].strip()
-                    print("\n──── Scraping:", addr)
-                    data = scrape(driver, addr)
-                    wtr.writerow([addr,
-                                  data["price"], data["lotSize"], data["yearBuilt"],
-                                  data["livingArea"], data["bedrooms"], data["bathrooms"]])
-                    fo.flush(); os.fsync(fo.fileno())     #  <── instant-save
-                    print("   →", data)
-                    time.sleep(random.uniform(4, 8))
 
+def main():
+    global BASE_URL, URL_CACHE, JS_HARVEST, ARCHIVE
+    ap = argparse.ArgumentParser(description="Redfin → house_details_redfin.csv (appending)")
+    ap.add_argument("--in",  dest="in_csv",  default="addresses.csv")
+    ap.add_argument("--out", dest="out_csv", default="house_details_redfin.csv")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="independent Chrome browsers scraping in parallel")
+    ap.add_argument("--base-url", default=BASE_URL,
+                    help="site root, e.g. http://127.0.0.1:8765 for fixture_server.py")
+    ap.add_argument("--retry-failed", action="store_true",
+                    help="only re-scrape addresses listed in <out>.failed.csv")
+    ap.add_argument("--url-cache", default="redfin_url_cache.json",
+                    help="address → property-URL cache file ('' to disable)")
+    ap.add_argument("--url-cache-ttl", type=float, default=90, metavar="DAYS")
+    ap.add_argument("--js-harvest", action="store_true",
+                    help="read price + Public facts with one injected script per page")
+    ap.add_argument("--ready-timeout", action="append", metavar="STAGE=SECS",
+                    help="upper bound for a readiness wait (cookie, search, "
+                         "second_enter, sold, details); repeatable")
+    ap.add_argument("--fixed-tiers", action="store_true",
+                    help="always try search → second ENTER → sold instead of the "
+                         "order learned from the landing page")
+    ap.add_argument("--rpm", type=float, default=None,
+                    help="starting requests/min across all workers (default: --workers × 10)")
+    ap.add_argument("--max-rpm", type=float, default=60,
+                    help="ceiling the adaptive limiter may loosen up to")
+    ap.add_argument("--archive", default="page_archive",
+                    help="store every parsed page_source here for reparse.py ('' to disable)")
+    ap.add_argument("--profile", metavar="DIR",
+                    help="persistent Chrome profile per browser (DIR/w0, DIR/w1 …) – "
+                         "cookies and the consent banner survive restarts")
+    ap.add_argument("--warm-session", action="store_true",
+                    help="search from the current page instead of reloading the homepage; "
+                         "skip the cookie-banner check once handled")
+    ap.add_argument("--block-heavy", action="store_true",
+                    help="don't download images, fonts, media or map tiles")
+    ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--recycle-pages", type=int, default=250, metavar="N",
+                    help="restart each browser after N pages (0: never)")
+    ap.add_argument("--max-rss", type=float, default=2048, metavar="MB",
+                    help="restart a browser whose chromedriver + Chrome RSS exceeds this (0: off)")
+    ap.add_argument("--features", metavar="NPZ|PARQUET",
+                    help="finally write typed, validated columns (redfin_features.py) here")
+    ap.add_argument("--trace", metavar="JSONL",
+                    help="append per-address stage timings here and print p50/p95/p99")
+    ap.add_argument("--store", metavar="SQLITE",
+                    help="keep results in this SQLite store (upsert per address) and "
+                         "regenerate --out from it at the end")
+    ap.add_argument("--refresh-days", type=float, default=30,
+                    help="with --store: only re-scrape homes older than this, or incomplete")
+    ap.add_argument("--shard", type=parse_shard, metavar="i/N",
+                    help="only this machine's stable slice of the input (0-based i); give "
+                         "each shard its own --out and combine them with merge_shards.py")
+    ap.add_argument("--no-dedupe", action="store_true",
+                    help="scrape every input row, even variants of the same property")
+    ap.add_argument("--no-retry", action="store_true",
+                    help="write failures to .failed.csv at once instead of retrying them "
+                         "later in the run (timeout / blocked / no_result / parse_miss backoffs)")
+    ap.add_argument("--retry-tail", type=float, default=120, metavar="SECS",
+                    help="after the main pass wait at most this long for deferred retries; "
+                         "later ones go to .failed.csv")
+    ap.add_argument("--durability", choices=POLICIES, default="row",
+                    help="row: 1 fsync per row | group: 1 fsync per --group-rows rows / "
+                         "--group-ms ms | journal: 1 small fsync per row + 1 per group")
+    ap.add_argument("--group-rows", type=int, default=50)
+    ap.add_argument("--group-ms", type=float, default=1000)
+    ap.add_argument("--pipeline", action="store_true",
+                    help="asyncio pipeline: browsers fetch while other processes parse")
+    ap.add_argument("--parse-workers", type=int, default=2,
+                    help="parser processes for --pipeline")
+    ap.add_argument("--queue", type=int, default=None,
+                    help="bound of each --pipeline queue (default: 2 × --workers)")
+    args = ap.parse_args()
+    if args.trace:
+        TRACE.enable(args.trace)
+    SESSION.profile, SESSION.warm = args.profile, args.warm_session
+    SESSION.block, SESSION.headless = args.block_heavy, args.headless
+    SESSION.measuring = bool(args.trace)          # page load ms + bytes per parsed page
+    set_ready_timeouts(args.ready_timeout)
+    LADDER.adaptive = not args.fixed_tiers
+    BASE_URL   = args.base_url.rstrip("/")
+    JS_HARVEST = args.js_harvest
+    rate = AdaptiveRateLimiter(
+        rpm=args.rpm or args.workers * 60 / (sum(PAUSE_RANGE) / 2), max_rpm=args.max_rpm)
+    round_trips = RoundTripCounter()
+    retry       = None if args.no_retry else RetryQueue(tail_cap=args.retry_tail)
+    sup         = DriverSupervisor(new_driver, max_pages=args.recycle_pages,
+                                   max_rss_mb=args.max_rss,   # restarts on a dead session …
+                                   retries=0 if retry else 1)  # … the retry queue retries
+    scrape_fn   = sup.wrap(round_trips.wrap(rate.wrap(TRACE.wrap(scrape), probe=page_head_text)))
+    fetch_fn    = sup.wrap(round_trips.wrap(rate.wrap(TRACE.wrap(fetch), probe=page_head_text)))
+    if retry:                          # failure → class → deferred retry within this run
+        scrape_fn = retry.wrap(scrape_fn, probe=page_head_text)
+        fetch_fn  = retry.wrap(fetch_fn, probe=page_head_text)
+
+    def run(addrs, on_result):
+        if retry:
+            addrs, on_result = retry.feed(addrs), retry.on_result(on_result)
+        if args.pipeline:
+            run_pipeline(addrs, fetch_fn, parse_fetched, sup.new_driver, on_result,
+                         workers=args.workers, parse_workers=args.parse_workers,
+                         queue_size=args.queue)
+        else:
+            run_pool(addrs, scrape_fn, sup.new_driver, on_result,
+                     workers=args.workers, pause_range=None)
+
+    if args.url_cache:
+        URL_CACHE = URLCache(args.url_cache, ttl_days=args.url_cache_ttl)
+    if args.archive:
+        ARCHIVE = PageArchive(args.archive)
+
+    IN_CSV, OUT_CSV = args.in_csv, args.out_csv
+
+    header = ["address", "price", "lotSize", "yearBuilt",
+              "livingArea", "bedrooms", "bathrooms"]
+    store  = ResultStore(args.store, ttl_days=args.refresh_days) if args.store else None
+    if not store:
+        repair_tail(OUT_CSV)               # half-written row from a crash
+    progress = ProgressIndex(OUT_CSV)
+    writer = None if store else DurableWriter(
+        OUT_CSV, header, progress, policy=args.durability,
+        group_rows=args.group_rows, group_ms=args.group_ms)
+
+    def save(addr, data):              # called in input order
+        if store:                      # failures too – an incomplete row gets retried
+            store.upsert(addr, data, data.get("tier", ""))
+        if not data.get("price"):      # error / no price → retry list, not the CSV
+            progress.mark_failed(addr, data.get("failure") or ("no price" if data else "error"), data)
+            print("   ✗", addr, data or "(error)")
+            return
+        if store or writer.write(addr, [data.get(k, "") for k in header[1:]]):
+            print("   →", addr, data)
+
+    def todo(addrs, is_done):
+        skipped = 0
+        for addr in addrs:
+            if is_done(addr):
+                skipped += 1
+                continue
+            yield addr
+        print(f"\n(skipped {skipped} already-scraped addresses)")
+
+    def plan(addrs):                   # one scrape per property, result → every variant
+        is_done = store.is_fresh if store else progress.is_done
+        if args.no_dedupe:
+            return todo(addrs, is_done), save
+        return index.stream(addrs, is_done), index.fan_out(save)
+
+    index = AddressIndex()
+    try:
+        if args.retry_failed:
+            run(*plan(shard_filter(progress.failed(), args.shard)))
+        else:                          # streamed – the input never sits in memory
+            run(*plan(read_addresses(IN_CSV, args.shard)))
+        index.flush(save)
     finally:
-        driver.quit()
-
+        if index.rows:
+            print(index.report())
+        close_run(writer, progress)    # writer first – its final commit marks .done
+        if writer:
+            print(writer.report())
+        if store:
+            n = store.export_csv(OUT_CSV, header)
+            print(store.report()); print(f"   {n} priced rows exported → {OUT_CSV}")
+            store.close()
+        if URL_CACHE:
+            URL_CACHE.close()
+            print(URL_CACHE.report())
+        if ARCHIVE:
+            print(ARCHIVE.report())
+        print(rate.report())
+        print(round_trips.report())
+        print(WAITS.report())
+        print(SESSION.report())
+        print(LADDER.report())
+        print(sup.report())
+        if retry:
+            print(retry.report())
+        if TRACE.on:
+            print(TRACE.summary()); TRACE.close()
+    if args.features:                  # typed columnar copy for modeling
+        from redfin_features import write_features
+        print(write_features(OUT_CSV, args.features))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+bench_redfin.py   –   2025-08-07
+Offline benchmarks for the Redfin scrapers.
+
+    python bench_redfin.py extract [--pad-kb 2000] [--repeat 50] [pages…]
+    python bench_redfin.py fetch   [--workers 4] [--rounds 20] [--latency 0.05]
+    python bench_redfin.py suite   [--flow] [--label txt] [--results bench_results.jsonl]
+    python bench_redfin.py durability [--rows 120] [--group-rows 16] [--rounds 3]
+
+`extract` times the original regex cascades (kept verbatim below as
+legacy_*) against redfin_extract on saved pages – fixtures/pages/*.html
+by default – and reports per-page time and peak allocation per call.
+--pad-kb inflates each page with filler markup in front of the JSON to
+mimic a real multi-MB page_source.
+
+`fetch` starts fixture_server.py and compares addresses/s for the
+HTTP-first path (redfin_http + parsers) against browser-only
+scrape_one() on the same corpus; the browser half is skipped when no
+Chrome/chromedriver is available.
+
+`suite` is the regression run: it times B2._regex_price / _parse_extras /
+_digits and redfin-gemini._regex_price / parse_home_facts per page and
+in bulk, checks every page against fixtures/expected.csv, optionally
+(--flow) drives scrape_one() through fixture_server.py in headless
+Chrome, then appends the numbers to bench_results.jsonl and prints the
+change against the previous stored run.
+
+`durability` is the kill/resume check for redfin_writer's policies. A
+child process writes rows and SIGKILLs itself at a random point: right
+after a write (mid-group / rows only in the journal), inside a commit
+after the CSV fsync (before .done), or halfway through the CSV write
+(torn line). Recovery must keep every row the child had acknowledged,
+and a resumed run must end with every address exactly once. A `close`
+run per policy is not killed: it shuts down as B2 does with rows still
+pending and the commit timer racing, and must exit cleanly with every
+row in the CSV and .done. Exit status 1 on any miss.
+"""
+
+import argparse, csv, glob, html, importlib.util, json, os, platform, random, re, signal
+import statistics, subprocess, sys, tempfile, time, tracemalloc
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import fixture_server
+import redfin_extract
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ACRES_PER_SQFT = 43_560
+
+
+# ═════════════════ legacy extractors (pre redfin_extract) ═════════════════
+def legacy_b2_regex_price(src):
+    m = re.search(r'"avmText":"([^"]*?\$[0-9,]+)', src)
+    if m:
+        return "Redfin Estimate", re.search(r'\$[0-9,]+', html.unescape(m.group(1))).group(0)
+    m = re.search(r'"segments":\s*```math.*?"text":"[^"]*?FOR \$([0-9,]+)', src, re.DOTALL)
+    if m:
+        return "Sold Price", f"${m.group(1)}"
+    return None
+
+
+def legacy_b2_parse_extras_json(src):
+    d = {"lotSize": None, "yearBuilt": None, "livingArea": None,
+         "bedrooms": None, "bathrooms": None}
+    m = re.search(r'"sqFt"\s*:\s*([0-9,]+)', src)
+    if m: d["livingArea"] = int(m.group(1).replace(",", ""))
+    m = re.search(r'"lotSize[A-Za-z]*"\s*:\s*([0-9,\.]+)', src)
+    if m: d["lotSize"] = float(m.group(1).replace(",", ""))
+    m = re.search(r'"yearBuilt"\s*:\s*([0-9]{4})', src)
+    if m: d["yearBuilt"] = int(m.group(1))
+    m = re.search(r'"beds"\s*:\s*([0-9]+)', src)
+    if m: d["bedrooms"] = int(m.group(1))
+    m = re.search(r'"baths"\s*:\s*([0-9\.]+)', src)
+    if m: d["bathrooms"] = float(m.group(1))
+    return d
+
+
+def legacy_regex_price(src):
+    for pat in (
+        r'"avmText":"[^"]*?\$([0-9,]+)',
+        r'"segments":\s*\[.*?FOR\s+\$([0-9,]+)'
+    ):
+        m = re.search(pat, src, re.DOTALL)
+        if m:
+            return m.group(1)
+    return ""
+
+
+def legacy_parse_home_facts(src):
+    facts = {k: "" for k in
+             ("livingArea", "lotSize", "yearBuilt", "beds", "baths")}
+    block = re.search(r'"addressSectionInfo":\{.+?}', src, re.DOTALL)
+    if block:
+        j = block.group(0)
+
+        def jnum(pat, as_float=False):
+            m = re.search(pat, j)
+            if m:
+                return (m.group(1).replace(",", "") if not as_float
+                        else m.group(1))
+            return ""
+
+        facts["livingArea"] = (
+            jnum(r'"sqFtFinished"\s*:\s*([0-9,]+)') or
+            jnum(r'"sqFt"\s*\{\s*"displayLevel":[0-9]+,\s*"value":\s*([0-9,]+)')
+        )
+        lot_sqft = jnum(r'"lotSize"\s*:\s*([0-9,]+)')
+        if not lot_sqft:
+            lot_sqft = jnum(r'"lotSize"\s*\{\s*"displayLevel":[0-9]+,\s*"value":\s*([0-9,]+)')
+        if lot_sqft:
+            acres = round(int(lot_sqft.replace(",", "")) / ACRES_PER_SQFT, 2)
+            facts["lotSize"] = str(acres)
+        facts["yearBuilt"] = jnum(r'"yearBuilt"\s*:\s*([0-9]{4})')
+        facts["beds"]      = jnum(r'"beds"\s*:\s*([0-9]+)')
+        facts["baths"]     = jnum(r'"baths"\s*:\s*([0-9.]+)', as_float=True)
+
+    if not facts["livingArea"]:
+        m = re.search(r'([\d,]+)\s+square\s+foot', src, re.I)
+        if m: facts["livingArea"] = m.group(1).replace(",", "")
+    if not facts["lotSize"]:
+        m = re.search(r'([0-9.]+)\s*acre(?:s)?\s+lot', src, re.I)
+        if m: facts["lotSize"] = m.group(1)
+    if not facts["yearBuilt"]:
+        m = re.search(r'Year Built[^0-9]*([0-9]{4})', src, re.I)
+        if m: facts["yearBuilt"] = m.group(1)
+    if not facts["beds"]:
+        m = re.search(r'(\d+)\s+bed(?:room)?s?', src, re.I)
+        if m: facts["beds"] = m.group(1)
+    if not facts["baths"]:
+        m = re.search(r'(\d+(?:\.\d)?)\s+bath', src, re.I)
+        if m: facts["baths"] = m.group(1)
+    return facts
+
+
+def legacy_all(src):
+    """Everything the old scrape paths ran over one page_source."""
+    legacy_b2_regex_price(src); legacy_b2_parse_extras_json(src)
+    legacy_regex_price(src);    legacy_parse_home_facts(src)
+
+
+# ═════════════════════════════ helpers ═════════════════════════════
+FILLER = ('<div class="HomeCard"><img src="/photo.jpg" alt="Photo of home">'
+          '<span class="homecardV2Price">Listed</span><p>Lorem ipsum dolor sit '
+          'amet, consectetur adipiscing elit, sed do eiusmod tempor.</p></div>\n')
+
+
+def load_pages(paths, pad_kb=0):
+    pages = {}
+    for p in paths or sorted(glob.glob(os.path.join(HERE, "fixtures", "pages", "*.html"))):
+        with open(p, encoding="utf-8") as f:
+            src = f.read()
+        if pad_kb:
+            filler = FILLER * (pad_kb * 1024 // len(FILLER) + 1)
+            src = src.replace("<script>", filler + "<script>", 1)
+        pages[os.path.basename(p)] = src
+    return pages
+
+
+def time_call(fn, src, repeat):
+    """→ (median µs per call, peak KiB allocated during one call)"""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(src); samples.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(src)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(samples) * 1e6, peak / 1024
+
+
+def load_script(name="redfin-gemini.py"):
+    """Import a runner script by path (the hyphen keeps it off sys.path)."""
+    spec = importlib.util.spec_from_file_location(
+        os.path.splitext(name)[0].replace("-", "_"), os.path.join(HERE, name))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def headless_driver(g):
+    from selenium import webdriver
+    opts = g.Options()
+    opts.add_argument("--headless=new"); opts.add_argument("--no-sandbox")
+    return webdriver.Chrome(options=opts)
+
+
+# ═════════════════════════════ commands ═════════════════════════════
+def cmd_extract(a):
+    pages = load_pages(a.pages, a.pad_kb)
+    contenders = (("legacy", legacy_all), ("extract", redfin_extract.extract))
+    print(f"{'page':24} {'KiB':>7} " + " ".join(f"{n+' µs':>12} {n+' KiB':>12}" for n, _ in contenders))
+    tot = {n: 0.0 for n, _ in contenders}
+    for name, src in pages.items():
+        row = []
+        for n, fn in contenders:
+            us, kib = time_call(fn, src, a.repeat)
+            tot[n] += us
+            row.append(f"{us:12.1f} {kib:12.1f}")
+        print(f"{name:24} {len(src) / 1024:7.0f} " + " ".join(row))
+    print(f"\nbulk ({len(pages)} pages): " +
+          ", ".join(f"{n} {us / 1000:.2f} ms" for n, us in tot.items()) +
+          (f"  → ×{tot['legacy'] / tot['extract']:.1f}" if tot["extract"] else ""))
+
+
+def cmd_fetch(a):
+    from redfin_http import HTTPFetcher
+    from redfin_cache import URLCache
+    from redfin_pool import run_pool
+
+    srv  = fixture_server.serve(0, latency=a.latency, background=True)
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    g    = load_script()
+    g.BASE_URL  = base
+    g.URL_CACHE = URLCache(os.path.join(tempfile.mkdtemp(), "urls.json"))
+
+    # what the URL cache would hold after one resolving run
+    http  = HTTPFetcher(workers=a.workers)
+    addrs = [r["address"] for r in fixture_server.load_routes().values()]
+    urls  = {}
+    for addr in addrs:
+        r = http.pool.request("GET", f"{base}/search/{addr}")
+        if "/home/" in r.geturl():
+            urls[addr] = base + r.geturl() if r.geturl().startswith("/") else r.geturl()
+            g.URL_CACHE.put(addr, urls[addr])
+    work = [addr for addr in addrs if addr in urls] * a.rounds
+    print(f"corpus: {len(urls)}/{len(addrs)} addresses with a property URL, "
+          f"{len(work)} fetches per mode, {a.workers} workers, +{a.latency * 1000:.0f} ms server latency")
+
+    g.HTTP = http
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(a.workers) as ex:
+        got = list(ex.map(lambda addr: g._from_http(addr, urls[addr]), work))
+    dt = time.perf_counter() - t0
+    print(f"HTTP-first   : {len(work) / dt:8.1f} addr/s  ({sum(r is None for r in got)} would escalate)")
+    print("              " + http.report())
+
+    g.HTTP = None
+    try:
+        t0 = time.perf_counter()
+        n = run_pool(work, g.scrape_one, lambda: headless_driver(g), lambda *_: None,
+                     workers=a.workers, pause_range=None)
+        dt = time.perf_counter() - t0
+        print(f"browser-only : {n / dt:8.1f} addr/s")
+    except Exception as e:                          # no Chrome / chromedriver here
+        print(f"browser-only : skipped ({type(e).__name__}: {str(e).splitlines()[0][:80]})")
+    srv.shutdown()
+
+
+def load_expected(path=os.path.join(HERE, "fixtures", "expected.csv")) -> dict:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {r.pop("page"): r for r in csv.DictReader(f)}
+
+
+def git_rev() -> str:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=HERE, capture_output=True, text=True).stdout.strip()
+        return (rev or "unknown") + ("+dirty" if dirty else "")
+    except OSError:
+        return "unknown"
+
+
+def _same(got, want) -> bool:
+    if str(got or "") == want:
+        return True
+    try:
+        return float(got) == float(want)
+    except (TypeError, ValueError):
+        return False
+
+
+def _check_page(b2, g, src, want) -> list:
+    """→ list of 'field: got≠want' strings for both scripts' parsers."""
+    gf = g.parse_home_facts(src)
+    gem = {"price": g._strip_money(g._regex_price(src)), "lotSize": gf["lotSize"],
+           "yearBuilt": gf["yearBuilt"], "livingArea": gf["livingArea"],
+           "bedrooms": gf["beds"], "bathrooms": gf["baths"]}
+    pp = b2._regex_price(src)
+    b2x = dict(b2._parse_extras(None, src), price=b2._digits(pp[1]) if pp else "")
+    bad = []
+    for who, got in (("gemini", gem), ("B2", b2x)):
+        bad += [f"{who}.{k}: {got[k]!r}≠{v!r}" for k, v in want.items() if not _same(got[k], v)]
+    return bad
+
+
+def _flow(g, expected, workers):
+    """scrape_one() over fixtures/addresses.csv via fixture_server + headless Chrome."""
+    from redfin_pool import run_pool
+    routes = fixture_server.load_routes()
+    srv = fixture_server.serve(0, background=True)
+    g.BASE_URL, g.URL_CACHE, g.HTTP = f"http://127.0.0.1:{srv.server_address[1]}", None, None
+    addrs = [r["address"] for r in routes.values()]
+    got, secs = {}, {}
+
+    def timed(driver, addr):
+        t0 = time.perf_counter()
+        try:
+            return g.scrape_one(driver, addr)
+        finally:
+            secs[addr] = time.perf_counter() - t0
+
+    try:
+        run_pool(addrs, timed, lambda: headless_driver(g),
+                 lambda addr, data: got.__setitem__(addr, data),
+                 workers=workers, pause_range=None)
+    except Exception as e:
+        srv.shutdown()
+        return {"skipped": f"{type(e).__name__}: {str(e).splitlines()[0][:80]}"}
+    srv.shutdown()
+
+    bad = []
+    for addr, r in ((r["address"], r) for r in routes.values()):
+        pages = [r["page"], r.get("second_page"), r.get("sold_page")]
+        final = next((p for p in pages if p and expected[p]["price"]), r["page"])
+        bad += [f"{addr}.{k}: {got[addr].get(k)!r}≠{v!r}"
+                for k, v in expected[final].items() if not _same(got[addr].get(k), v)]
+    v = sorted(secs.values())
+    return {"addresses": len(v), "p50_s": statistics.median(v), "max_s": v[-1],
+            "total_s": sum(v), "mismatches": bad}
+
+
+def cmd_suite(a):
+    b2, g  = load_script("B2.py"), load_script()
+    pages  = load_pages(a.pages, a.pad_kb)
+    expect = load_expected()
+    funcs  = (
+        ("B2._regex_price",      b2._regex_price),
+        ("B2._parse_extras",     lambda src: b2._parse_extras(None, src)),
+        ("B2._digits",           None),                  # fed the page's price text
+        ("gemini._regex_price",  g._regex_price),
+        ("gemini.parse_home_facts", g.parse_home_facts),
+    )
+    price_txt = {n: (redfin_extract.extract(src)["price"] or "") for n, src in pages.items()}
+
+    per_page, bulk = {}, {}
+    print(f"{'page':24} " + " ".join(f"{n.split('.')[-1][:16]:>16}" for n, _ in funcs) + "   (µs)")
+    for name, src in pages.items():
+        row = {}
+        for fname, fn in funcs:
+            arg, fn = (price_txt[name], b2._digits) if fn is None else (src, fn)
+            row[fname] = round(time_call(fn, arg, a.repeat)[0], 2)
+        per_page[name] = row
+        print(f"{name:24} " + " ".join(f"{row[f]:16.1f}" for f, _ in funcs))
+
+    for fname, fn in funcs:
+        t0 = time.perf_counter()
+        for _ in range(a.repeat):
+            for name, src in pages.items():
+                (b2._digits(price_txt[name]) if fn is None else fn(src))
+        bulk[fname] = round((time.perf_counter() - t0) * 1e6 / (a.repeat * len(pages)), 2)
+    print("bulk µs/page: " + ", ".join(f"{f}={us:.1f}" for f, us in bulk.items()))
+
+    mism = []
+    for name, src in pages.items():
+        if name in expect:
+            mism += [f"{name} {m}" for m in _check_page(b2, g, src, expect[name])]
+    print(f"correctness: {len(mism)} mismatches over {sum(n in expect for n in pages)} pages")
+    for m in mism:
+        print("   ✗", m)
+
+    flow = _flow(g, expect, a.workers) if a.flow else None
+    if flow:
+        if "skipped" in flow:
+            print(f"flow: skipped ({flow['skipped']})")
+        else:
+            print(f"flow: {flow['addresses']} addresses, p50 {flow['p50_s']:.2f} s, "
+                  f"max {flow['max_s']:.2f} s, {len(flow['mismatches'])} mismatches")
+            for m in flow["mismatches"]:
+                print("   ✗", m)
+
+    rec = {"when": datetime.now().isoformat(timespec="seconds"), "rev": git_rev(),
+           "label": a.label, "python": platform.python_version(), "pad_kb": a.pad_kb,
+           "repeat": a.repeat, "bulk_us_per_page": bulk, "per_page_us": per_page,
+           "mismatches": len(mism), "flow": flow}
+    prev = None
+    if os.path.exists(a.results):
+        with open(a.results, encoding="utf-8") as f:
+            same = [json.loads(l) for l in f if l.strip()]
+        same = [r for r in same if r.get("pad_kb") == a.pad_kb]
+        prev = same[-1] if same else None
+    with open(a.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec) + "\n")
+
+    if prev:
+        print(f"\nvs {prev['rev']} ({prev['when']}):")
+        for fname, us in bulk.items():
+            old = prev["bulk_us_per_page"].get(fname)
+            if old:
+                print(f"  {fname:26} {old:9.1f} → {us:9.1f} µs/page  ({(us - old) / old * 100:+.0f}%)")
+        if prev["mismatches"] != len(mism):
+            print(f"  mismatches {prev['mismatches']} → {len(mism)}")
+    print(f"stored in {a.results}")
+
+
+# ─────────────────────────── durability ───────────────────────────
+KILL_POINTS = ("write", "commit", "tear")
+
+
+def _dur_addr(i):
+    return f"{i} Durability Ln, Saratoga Springs, NY"
+
+
+class _TornFile:
+    """CSV file stand-in: the next write() lands half its bytes, then the process dies."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, txt):
+        self._f.write(txt[:len(txt) // 2]); self._f.flush(); os.fsync(self._f.fileno())
+        os.kill(os.getpid(), signal.SIGKILL)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def _dur_child(a):
+    """One writer run as B2 does it (repair, index, skip done); prints 'ack <addr>' lines."""
+    from redfin_progress import ProgressIndex
+    from redfin_writer import DurableWriter, close_run, repair_tail
+    out = os.path.join(a.child, "out.csv")
+    repair_tail(out)
+    progress = ProgressIndex(out)
+    writer = DurableWriter(out, ["address", "price"], progress, policy=a.policy,
+                           group_rows=a.group_rows,    # close: timer commits race the shutdown
+                           group_ms=2 if a.kill_in == "close" else 1e9)
+    commits = [0]
+    if a.kill_in in ("commit", "tear"):
+        done_many = progress.mark_done_many
+
+        def mark_done_many(addrs, **kw):            # runs right after the CSV fsync
+            commits[0] += 1
+            if commits[0] == a.kill_at and a.kill_in == "commit":
+                os.kill(os.getpid(), signal.SIGKILL)
+            if commits[0] == a.kill_at - 1 and a.kill_in == "tear":
+                writer._f = _TornFile(writer._f)    # the next commit tears
+            return done_many(addrs, **kw)
+        progress.mark_done_many = mark_done_many
+        if a.kill_at == 1 and a.kill_in == "tear":
+            writer._f = _TornFile(writer._f)
+
+    unacked = []
+    for i in range(a.rows):
+        addr = _dur_addr(i)
+        if progress.is_done(addr):
+            continue
+        before = writer.commits
+        writer.write(addr, [str(100_000 + i)])
+        unacked.append(addr)
+        if a.policy != "group" or writer.commits != before:   # fsync returned → acknowledged
+            for x in unacked:
+                print("ack", x, flush=True)
+            unacked.clear()
+        if a.kill_in == "write" and i + 1 == a.kill_at:
+            os.kill(os.getpid(), signal.SIGKILL)
+    close_run(writer, progress)                     # B2.main's shutdown
+    for x in unacked:
+        print("ack", x, flush=True)
+
+
+def _dur_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [r for r in csv.reader(f)][1:]
+
+
+def cmd_durability(a):
+    if a.child:
+        return _dur_child(a)
+    from redfin_writer import POLICIES
+
+    def child(tmp, policy, kill_in="", kill_at=0):
+        cmd = [sys.executable, os.path.abspath(__file__), "durability", "--child", tmp,
+               "--policy", policy, "--rows", str(a.rows), "--group-rows", str(a.group_rows),
+               "--kill-in", kill_in, "--kill-at", str(kill_at)]
+        p = subprocess.run(cmd, capture_output=True, text=True, cwd=HERE)
+        if p.returncode not in (0, -signal.SIGKILL) and kill_in != "close":
+            raise RuntimeError(p.stderr)
+        return p.returncode, [l[4:] for l in p.stdout.splitlines() if l.startswith("ack ")]
+
+    rnd, bad = random.Random(a.seed), 0
+    print(f"{'policy':8} {'kill in':8} {'at':>4} {'acked':>6} {'kept':>6} {'final':>6}  result")
+    for policy in POLICIES:                         # clean shutdown with rows pending
+        with tempfile.TemporaryDirectory() as tmp:
+            code, acked = child(tmp, policy, "close")
+            rows = _dur_rows(os.path.join(tmp, "out.csv"))
+            with open(os.path.join(tmp, "out.csv.done"), encoding="utf-8") as f:
+                done = sum(1 for l in f if l.strip())
+        errs = ([f"exit {code}"] if code else []) + \
+               ([f"{len(rows)} rows"] if len(rows) != a.rows else []) + \
+               ([f"{done} .done keys"] if done != a.rows else [])
+        bad += bool(errs)
+        print(f"{policy:8} {'close':8} {'':>4} {len(acked):6d} {'':>6} {len(rows):6d}  "
+              f"{'✗ ' + '; '.join(errs) if errs else '✓'}")
+        for kill_in in KILL_POINTS:
+            for _ in range(a.rounds):
+                commits = a.rows if policy == "row" else a.rows // a.group_rows
+                at = (rnd.randrange(1, a.rows) if kill_in == "write"
+                      else rnd.randrange(1, max(2, commits)))
+                with tempfile.TemporaryDirectory() as tmp:
+                    code, acked = child(tmp, policy, kill_in, at)
+                    out = os.path.join(tmp, "out.csv")
+                    # recovery only: a writer that opens (repair, replay) and closes
+                    subprocess.run([sys.executable, "-c",
+                                    "import sys; from redfin_progress import ProgressIndex; "
+                                    "from redfin_writer import DurableWriter, repair_tail; "
+                                    "o = sys.argv[1]; repair_tail(o); p = ProgressIndex(o); "
+                                    f"DurableWriter(o, ['address', 'price'], p, policy={policy!r}).close()",
+                                    out], capture_output=True, cwd=HERE, check=True)
+                    kept = {r[0] for r in _dur_rows(out)}
+                    child(tmp, policy)              # resume to the end
+                    rows = _dur_rows(out)
+                want = {_dur_addr(i): str(100_000 + i) for i in range(a.rows)}
+                got  = [r[0] for r in rows]
+                errs = []
+                if code != -signal.SIGKILL:
+                    errs.append("child was not killed")
+                if set(acked) - kept:
+                    errs.append(f"{len(set(acked) - kept)} acknowledged rows lost")
+                if len(got) != len(set(got)):
+                    errs.append(f"{len(got) - len(set(got))} duplicates")
+                if set(want) - set(got):
+                    errs.append(f"{len(set(want) - set(got))} missing")
+                if any(len(r) != 2 or want.get(r[0]) != r[1] for r in rows):
+                    errs.append("malformed rows")
+                bad += bool(errs)
+                print(f"{policy:8} {kill_in:8} {at:4d} {len(acked):6d} {len(kept):6d} "
+                      f"{len(rows):6d}  {'✗ ' + '; '.join(errs) if errs else '✓'}")
+    runs = len(POLICIES) * (len(KILL_POINTS) * a.rounds + 1)
+    print(f"durability: {runs - bad}/{runs} kill/resume runs exact")
+    if bad:
+        sys.exit(1)
+
+
+def main():
+    ap  = argparse.ArgumentParser(description="Offline Redfin scraper benchmarks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("extract", help="legacy regex cascade vs redfin_extract")
+    p.add_argument("pages", nargs="*", help="saved page_source files (default: fixtures)")
+    p.add_argument("--pad-kb", type=int, default=0, help="inflate pages by this much filler")
+    p.add_argument("--repeat", type=int, default=50)
+    p.set_defaults(fn=cmd_extract)
+
+    p = sub.add_parser("fetch", help="HTTP-first vs browser-only throughput on fixtures")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--rounds", type=int, default=20, help="passes over the corpus")
+    p.add_argument("--latency", type=float, default=0.05, help="fixture server delay (s)")
+    p.set_defaults(fn=cmd_fetch)
+
+    p = sub.add_parser("suite", help="parser + flow regression run, stored as JSONL")
+    p.add_argument("pages", nargs="*", help="saved page_source files (default: fixtures)")
+    p.add_argument("--pad-kb", type=int, default=0, help="inflate pages by this much filler")
+    p.add_argument("--repeat", type=int, default=50)
+    p.add_argument("--flow", action="store_true",
+                   help="also run scrape_one() against fixture_server in headless Chrome")
+    p.add_argument("--workers", type=int, default=1, help="browsers for --flow")
+    p.add_argument("--label", default="", help="free-text note stored with the run")
+    p.add_argument("--results", default=os.path.join(HERE, "bench_results.jsonl"))
+    p.set_defaults(fn=cmd_suite)
+
+    p = sub.add_parser("durability", help="kill/resume check of the writer's durability policies")
+    p.add_argument("--rows", type=int, default=120)
+    p.add_argument("--group-rows", type=int, default=16)
+    p.add_argument("--rounds", type=int, default=3, help="random kill points per policy × kind")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--child", help=argparse.SUPPRESS)           # internal: the killed writer
+    p.add_argument("--policy", default="row", help=argparse.SUPPRESS)
+    p.add_argument("--kill-in", default="", help=argparse.SUPPRESS)
+    p.add_argument("--kill-at", type=int, default=0, help=argparse.SUPPRESS)
+    p.set_defaults(fn=cmd_durability)
+
+    a = ap.parse_args()
+    a.fn(a)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+fixture_server.py   –   2025-08-07
+Local stand-in for www.redfin.com that replays the saved pages in
+fixtures/pages, so the scrapers can be exercised without touching Redfin:
+
+    python fixture_server.py --port 8765 &
+    python B2.py --base-url http://127.0.0.1:8765 --in fixtures/addresses.csv --workers 4
+
+Routes (fixtures/routes.csv):
+    /                           → homepage with #search-box-input + cookie banner
+    /search/<address>           → `page`        (first ENTER)
+    /search/<address>?second=1  → `second_page` (second ENTER, falls back to `page`)
+    …/filter/include=sold       → `sold_page`
+    /static/…                   → listing photos, web font, map tiles (--asset-kb)
+Property pages are answered with a redirect to /home/<slug>?v=<page>, like
+the real site, so the final URL can be cached and fetched directly.
+Accepting the banner sets an rf_consent cookie; pages requested with it
+come without the banner, so a persistent Chrome profile shows the saving.
+"""
+
+import argparse, csv, html, os, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+HERE     = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+RESULTS_PAGES = {"search_results.html", "ambiguous.html"}   # served in place, no redirect
+
+BANNER = """<div id="cookie-banner"><button onclick="document.cookie='rf_consent=1; path=/; max-age=31536000';
+  this.parentNode.remove()">Accept all cookies</button></div>
+"""
+HEADER = """<form onsubmit="var v=document.getElementById('search-box-input').value.trim();
+  var again=decodeURIComponent(location.pathname.slice(8))===v;
+  location.href='/search/'+encodeURIComponent(v)+(again?'?second=1':'');
+  return false;">
+  <input id="search-box-input" type="search" value="%s">
+</form>"""
+# what a listing page pulls besides the HTML: photos, a web font, map tiles
+ASSETS = """<style>@font-face{font-family:rf;src:url(/static/font.woff2)} body{font-family:rf}</style>
+<div class="photos">%s</div><div class="map">%s</div>""" % (
+    "".join(f'<img src="/static/photo-{i}.jpg">' for i in range(6)),
+    "".join(f'<img src="/static/tiles/{i}.png">' for i in range(4)))
+ASSET_KB = {".jpg": 150, ".woff2": 60, ".png": 25}
+ASSET_TYPES = {".jpg": "image/jpeg", ".woff2": "font/woff2", ".png": "image/png"}
+
+HOMEPAGE = """<!DOCTYPE html>
+<html><head><title>Redfin (fixture)</title></head><body>
+%s
+</body></html>"""
+
+
+def slug(address: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", address.lower()).strip("-")
+
+
+def load_routes(path=os.path.join(FIXTURES, "routes.csv")) -> dict:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {slug(r["address"]): r for r in csv.DictReader(f)}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    routes    = {}
+    latency   = 0.0                                 # seconds added per request
+    asset_kb  = ASSET_KB
+
+    def log_message(self, *a):                      # keep the scraper output readable
+        pass
+
+    def _send(self, body: str, status=200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _header(self, address="") -> str:
+        consent = "rf_consent=1" in (self.headers.get("Cookie") or "")
+        return ("" if consent else BANNER) + HEADER % html.escape(address)
+
+    def _page(self, name: str, address="") -> str:
+        with open(os.path.join(FIXTURES, "pages", name), encoding="utf-8") as f:
+            body = f.read()
+        # every page carries the search box, like the real site header
+        return body.replace("<body>", "<body>\n" + self._header(address) + ASSETS, 1)
+
+    def _asset(self, path):
+        ext = os.path.splitext(path)[1]
+        if ext not in ASSET_TYPES:
+            return self._send("not found", 404)
+        data = b"\0" * (self.asset_kb[ext] * 1024)
+        self.send_response(200)
+        self.send_header("Content-Type", ASSET_TYPES[ext])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")  # every page pays, like fresh listing photos
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        url  = urlsplit(self.path)
+        path = unquote(url.path)
+        if path in ("/", ""):
+            return self._send(HOMEPAGE % self._header())
+        if path.startswith("/static/"):
+            return self._asset(path)
+        if path.startswith("/home/"):
+            name = parse_qs(url.query).get("v", [""])[0]
+            if not re.fullmatch(r"[\w-]+\.html", name):
+                return self._send("not found", 404)
+            return self._send(self._page(name))
+        if not path.startswith("/search/"):
+            return self._send("not found", 404)
+
+        sold = "/filter/" in path and "include=sold" in path
+        addr = path[len("/search/"):].split("/filter/")[0]
+        route = self.routes.get(slug(addr))
+        if route is None:
+            return self._send(self._page("search_results.html", addr))
+        if sold:
+            name = route.get("sold_page") or route["page"]
+        elif "second=1" in url.query:
+            name = route.get("second_page") or route["page"]
+        else:
+            name = route["page"]
+        if name in RESULTS_PAGES:
+            return self._send(self._page(name, addr))
+        self.send_response(302)
+        self.send_header("Location", f"/home/{slug(addr)}?v={name}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def serve(port=8765, latency=0.0, background=False, asset_kb=None):
+    """Start the server; with background=True return it running in a thread."""
+    FixtureHandler.routes, FixtureHandler.latency = load_routes(), latency
+    if asset_kb is not None:                        # one size for every asset type
+        FixtureHandler.asset_kb = dict.fromkeys(ASSET_KB, asset_kb)
+    srv = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    if background:
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        return srv
+    print(f"fixture Redfin on http://127.0.0.1:{srv.server_address[1]}  (Ctrl-C to stop)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local Redfin stand-in for the scrapers")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0,
+                    help="artificial per-request delay in seconds")
+    ap.add_argument("--asset-kb", type=int, default=None,
+                    help="size of every photo / font / tile (default: 150 / 60 / 25 KiB)")
+    a = ap.parse_args()
+    serve(a.port, a.latency, asset_kb=a.asset_kb)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+merge_shards.py   –   2025-08-07
+Combine the per-shard outputs of a `--shard i/N` run into one CSV, in the
+order of the original input:
+
+    python merge_shards.py --in addresses.csv --out house_details_redfin.csv \
+        shard0.csv shard1.csv shard2.csv shard3.csv      # shard files in i order
+
+The input is streamed once; for every address the owning shard is
+recomputed (redfin_input.shard_of) and its output is read forward until
+the row turns up. Shard outputs are already close to input order, so the
+look-ahead buffers stay small. Inputs without an output row (failed /
+not scraped) are counted; output rows the input never asked for go at
+the end.
+"""
+
+import argparse, csv, os
+from collections import defaultdict, deque
+
+from redfin_address import normalize_address
+from redfin_input import read_addresses, shard_of
+
+
+class _ShardReader:
+    def __init__(self, path, window):
+        self.f      = open(path, newline="", encoding="utf-8")
+        self.rdr    = csv.reader(self.f)
+        self.header = next(self.rdr, None)
+        self.buf    = defaultdict(deque)            # address key → rows read ahead
+        self.size   = 0                             # rows in buf
+        self.window = window
+
+    def take(self, key):
+        """Next row for `key`, holding at most `window` rows read ahead; None if absent."""
+        if key not in self.buf:
+            for row in self._rows():
+                k = normalize_address(row[0])
+                self.buf[k].append(row); self.size += 1
+                if k == key or self.size >= self.window:
+                    break
+        q = self.buf.get(key)
+        if not q:
+            return None
+        row = q.popleft(); self.size -= 1
+        if not q:
+            del self.buf[key]
+        return row
+
+    def _rows(self):
+        for row in self.rdr:
+            if row and row[0].strip():
+                yield row
+
+    def rest(self):
+        for q in self.buf.values():
+            yield from q
+        yield from self._rows()
+        self.f.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Merge --shard outputs back into input order")
+    ap.add_argument("shards", nargs="+", help="per-shard output CSVs, shard 0 first")
+    ap.add_argument("--in", dest="in_csv", required=True, help="the unsharded input CSV")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--window", type=int, default=100_000,
+                    help="max rows held read-ahead per shard; rows further out of "
+                         "order than this end up appended at the end")
+    a = ap.parse_args()
+
+    n = len(a.shards)
+    readers = [_ShardReader(p, a.window) for p in a.shards]
+    header  = next((r.header for r in readers if r.header), None)
+    written = missing = extra = 0
+    tmp = a.out + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as fo:
+        wtr = csv.writer(fo)
+        if header:
+            wtr.writerow(header)
+        for addr in read_addresses(a.in_csv):
+            row = readers[shard_of(addr, n)].take(normalize_address(addr))
+            if row is None:
+                missing += 1
+                continue
+            wtr.writerow(row); written += 1
+        for r in readers:
+            for row in r.rest():
+                wtr.writerow(row); extra += 1
+    os.replace(tmp, a.out)
+    print(f"{written} rows in input order, {missing} input addresses without a row, "
+          f"{extra} extra rows appended → {a.out}")
+
+
+if __name__ == "__main__":
+    main()
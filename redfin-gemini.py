@@ -5,8 +5,7 @@ Outputs CSV columns: address, price, lotSize(acres), yearBuilt,
                      livingArea(sqft), bedrooms, bathrooms
 """
 
-import csv, html, random, re, time
-from selenium import webdriver
+import argparse, contextlib, csv, re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
@@ -14,13 +13,37 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-ACRES_PER_SQFT = 43_560
+from redfin_pool import run_pool
+from redfin_pipeline import run_pipeline
+from redfin_store import ResultStore
+from redfin_address import AddressIndex
+from redfin_input import parse_shard, read_addresses
+from redfin_cache import URLCache
+from redfin_ratelimit import AdaptiveRateLimiter
+from redfin_trace import TRACE
+from redfin_session import SESSION
+from redfin_supervisor import DriverSupervisor
+from redfin_tiers import LADDER
+from redfin_archive import PageArchive
+from redfin_extract import cell, extract, lot_acres
+from redfin_browser import (PRICE_CSS, WAITS, RoundTripCounter, harvest,
+                            page_head_text, page_record, set_ready_timeouts,
+                            wait_for, wait_usable)
+
 WAIT_SECS      = 15
-PAUSE_RANGE    = (4, 8)          # polite pause between addresses
+PAUSE_RANGE    = (4, 8)          # old fixed pause → starting rate for the limiter
+BASE_URL       = "https://www.redfin.com"   # --base-url → local fixture_server.py
+URL_CACHE      = None            # redfin_cache.URLCache, set up in main()
+JS_HARVEST     = False           # --js-harvest: read the price with one JS call
+HTTP           = None            # --http-first: redfin_http.HTTPFetcher
+HTTP_REQUIRED  = ("livingArea", "yearBuilt")   # + price, else escalate to Chrome
+ARCHIVE        = None            # redfin_archive.PageArchive (--archive)
 
 
 # ────────────────────────── small helpers ─────────────────────────
 def handle_cookie_banner(driver):
+    if SESSION.banner_done(driver):     # consent already given in this browser / profile
+        return
     try:
         b = WebDriverWait(driver, 5).until(
             EC.element_to_be_clickable(
@@ -28,9 +51,10 @@ def handle_cookie_banner(driver):
                  "//*[contains(text(),'Accept all cookies')]"
                  "| //button[contains(text(),'Accept')]")))
         driver.execute_script("arguments[0].click();", b)
-        time.sleep(1)
+        wait_for(driver, "cookie", EC.invisibility_of_element(b), replaces=1)
+        SESSION.banner_seen(driver, True)
     except TimeoutException:
-        pass
+        SESSION.banner_seen(driver, False)
 
 
 def _strip_money(txt: str) -> str:
@@ -38,8 +62,12 @@ def _strip_money(txt: str) -> str:
     return re.sub(r"[^\d]", "", txt)
 
 
+@TRACE.timed("visible_price")
 def _visible_price(driver, secs=7):
-    css = "[data-testid='avm-price'] .value, .statsValue.price"
+    if JS_HARVEST:      # one execute_script instead of wait + element text
+        return harvest(driver, secs, facts_secs=0)["price"]
+
+    css = PRICE_CSS
     try:
         el = WebDriverWait(driver, secs).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, css)))
@@ -48,123 +76,93 @@ def _visible_price(driver, secs=7):
         return ""
 
 
+@TRACE.timed("parse")
 def _regex_price(src: str):
-    for pat in (
-        r'"avmText":"[^"]*?\$([0-9,]+)',                          # Redfin estimate
-        r'"segments":\s*\[.*?FOR\s+\$([0-9,]+)'                   # sold banner
-    ):
-        m = re.search(pat, src, re.DOTALL)
-        if m:
-            return m.group(1)
-    return ""
+    """Estimate / sold-banner price from the embedded JSON ('426,090' or '')."""
+    return _rec_price(extract(src))
+
+
+def _rec_price(rec: dict) -> str:
+    return (rec["price"] or "").lstrip("$")
 
 
 # ─────────────── parse living area / lot size / facts ───────────────
+@TRACE.timed("parse")
 def parse_home_facts(src: str) -> dict:
     """Return dict with livingArea, lotSize (acres), yearBuilt, beds, baths."""
-    facts = {k: "" for k in
-             ("livingArea", "lotSize", "yearBuilt", "beds", "baths")}
-
-    # 1️⃣  Embedded JSON (fast & language-agnostic) -------------------
-    block = re.search(r'"addressSectionInfo":\{.+?}', src, re.DOTALL)
-    if block:
-        j = block.group(0)
-
-        def jnum(pat, as_float=False):
-            m = re.search(pat, j)
-            if m:
-                return (m.group(1).replace(",", "") if not as_float
-                        else m.group(1))
-            return ""
+    return _facts(extract(src))  # embedded JSON first, HTML fall-backs inside
+
 
-        # living area -------------------------------------------------
-        facts["livingArea"] = (
-            jnum(r'"sqFtFinished"\s*:\s*([0-9,]+)') or
-            jnum(r'"sqFt"\s*\{\s*"displayLevel":[0-9]+,\s*"value":\s*([0-9,]+)')
-        )
-
-        # lot size (convert to acres if we only get square-feet) ------
-        lot_sqft = jnum(r'"lotSize"\s*:\s*([0-9,]+)')
-        if not lot_sqft:
-            lot_sqft = jnum(r'"lotSize"\s*\{\s*"displayLevel":[0-9]+,\s*"value":\s*([0-9,]+)')
-        if lot_sqft:
-            acres = round(int(lot_sqft.replace(",", "")) / ACRES_PER_SQFT, 2)
-            facts["lotSize"] = str(acres)
-
-        # simple numeric keys ----------------------------------------
-        facts["yearBuilt"] = jnum(r'"yearBuilt"\s*:\s*([0-9]{4})')
-        facts["beds"]      = jnum(r'"beds"\s*:\s*([0-9]+)')
-        facts["baths"]     = jnum(r'"baths"\s*:\s*([0-9.]+)', as_float=True)
-
-    # 2️⃣  HTML fall-backs (only if still blank) ----------------------
-    if not facts["livingArea"]:
-        m = re.search(r'([\d,]+)\s+square\s+foot', src, re.I)
-        if m:
-            facts["livingArea"] = m.group(1).replace(",", "")
-
-    if not facts["lotSize"]:
-        m = re.search(r'([0-9.]+)\s*acre(?:s)?\s+lot', src, re.I)
-        if m:
-            facts["lotSize"] = m.group(1)
-
-    if not facts["yearBuilt"]:
-        m = re.search(r'Year Built[^0-9]*([0-9]{4})', src, re.I)
-        if m:
-            facts["yearBuilt"] = m.group(1)
-
-    if not facts["beds"]:
-        m = re.search(r'(\d+)\s+bed(?:room)?s?', src, re.I)
-        if m:
-            facts["beds"] = m.group(1)
-
-    if not facts["baths"]:
-        m = re.search(r'(\d+(?:\.\d)?)\s+bath', src, re.I)
-        if m:
-            facts["baths"] = m.group(1)
-
-    return facts
+def _facts(rec: dict) -> dict:
+    return {
+        "livingArea": cell(rec["livingArea"]),
+        "lotSize":    cell(lot_acres(rec)),
+        "yearBuilt":  cell(rec["yearBuilt"]),
+        "beds":       cell(rec["beds"]),
+        "baths":      cell(rec["baths"]),
+    }
 
 
 # ─────────────────────── scrape one address ───────────────────────
-def scrape_one(driver, address: str) -> dict:
+def _search_price(driver, address: str, seen: dict) -> str:
+    """Homepage search box → price ladder. Returns '$…' text or ''.
+    `seen` is fetch_one()'s page memo (page_source / page_record)."""
     w = WebDriverWait(driver, WAIT_SECS)
 
     # Redfin home → search
-    driver.get("https://www.redfin.com")
-    handle_cookie_banner(driver)
-    box = w.until(EC.presence_of_element_located((By.ID, "search-box-input")))
-    box.clear(); box.send_keys(address); box.send_keys(Keys.ENTER)
-    w.until(EC.presence_of_element_located((By.TAG_NAME, "body"))); time.sleep(3)
-
-    # price (widget → regex)
-    price = _visible_price(driver) or _regex_price(driver.page_source)
+    with TRACE.span("homepage"):
+        box = SESSION.search_box(driver, BASE_URL)      # --warm-session: header box in place
+        if box is None:
+            driver.get(BASE_URL)
+            handle_cookie_banner(driver)
+    with TRACE.span("search"):
+        box = box or w.until(EC.presence_of_element_located((By.ID, "search-box-input")))
+        home = driver.current_url
+        box.clear(); box.send_keys(address); box.send_keys(Keys.ENTER)
+        wait_usable(driver, "search", replaces=3, old_url=home)
+
+    # price ladder – order learned per landing class (redfin_tiers)
+    landing = driver.current_url
+    cls     = LADDER.classify(driver)
+
+    def on_landing():               # widget → regex; a results page never grows a widget
+        return (_visible_price(driver, 7 if cls == "home" else 1)
+                or _rec_price(page_record(driver, seen)))
 
     # ambiguous results → “second-ENTER”
-    if not price:
+    def second_enter():
         try:
-            cur = driver.current_url
-            sb  = w.until(EC.presence_of_element_located((By.ID, "search-box-input")))
-            sb.send_keys(Keys.END); sb.send_keys(Keys.ENTER)
-            WebDriverWait(driver, 10).until(EC.url_changes(cur)); time.sleep(3)
-            price = _visible_price(driver, 5) or _regex_price(driver.page_source)
+            with TRACE.span("second_enter"):
+                if driver.current_url != landing:       # sold tier ran first
+                    driver.get(landing)
+                cur = driver.current_url
+                sb  = w.until(EC.presence_of_element_located((By.ID, "search-box-input")))
+                sb.send_keys(Keys.END); sb.send_keys(Keys.ENTER)
+                WebDriverWait(driver, 10).until(EC.url_changes(cur))
+                wait_usable(driver, "second_enter", replaces=3)
+            return _visible_price(driver, 5) or _rec_price(page_record(driver, seen))
         except TimeoutException:
-            pass
+            return ""
 
-    # final fallback → include=sold
-    if not price:
-        sold = driver.current_url + (",include=sold" if "/filter/" in driver.current_url
-                                     else "/filter/include=sold")
-        driver.get(sold); time.sleep(4)
-        price = _visible_price(driver, 5) or _regex_price(driver.page_source)
+    # off-market → include=sold
+    def sold():
+        with TRACE.span("sold"):
+            cur  = landing.split("?")[0]
+            driver.get(cur + (",include=sold" if "/filter/" in cur else "/filter/include=sold"))
+            wait_usable(driver, "sold", replaces=4)
+        return _visible_price(driver, 5) or _rec_price(page_record(driver, seen))
 
-    price = _strip_money(price)
+    tier, price = LADDER.climb(cls, {"search": on_landing,
+                                     "second_enter": second_enter, "sold": sold})
+    if price:
+        TRACE.tier(tier)
+    return price or ""
 
-    # other facts
-    facts = parse_home_facts(driver.page_source)
 
+def _row(address: str, price: str, facts: dict) -> dict:
     return {
         "address":    address,
-        "price":      price,
+        "price":      _strip_money(price),
         "lotSize":    facts["lotSize"],
         "yearBuilt":  facts["yearBuilt"],
         "livingArea": facts["livingArea"],
@@ -173,46 +171,235 @@ def scrape_one(driver, address: str) -> dict:
     }
 
 
-# ───────────────────────── runner ──────────────────────────
-def main():
-    IN_FILE, OUT_FILE = "testing.csv", "house_details_redfin.csv"
+def _from_http(address: str, url: str):
+    """--http-first: plain GET of the cached page → fetch payload. None → use Chrome."""
+    with TRACE.span("http_fetch"):
+        src = HTTP.fetch(url)
+    TRACE.add_bytes(len(src))
+    with TRACE.span("parse"):   # one pass – the payload carries the facts, not the page
+        rec = extract(src) if src else dict(price=None)
+    price = _rec_price(rec)
+    facts = _facts(rec) if price else {}
+    ok    = bool(price) and all(facts.get(k) for k in HTTP_REQUIRED)
+    HTTP.outcome(ok)
+    if ok:
+        TRACE.tier("http")
+        if ARCHIVE:
+            ARCHIVE.put(address, src, url)
+    return {"address": address, "price": price, "facts": facts, "tier": "http"} if ok else None
+
+
+def fetch_one(driver, address: str) -> dict:
+    """Browser half of scrape_one(): picklable {address, price, facts, tier} for
+    parse_fetched(). Every page is decoded once – price and facts share the record."""
+    price = ""
+    seen  = {}          # page_source pulled and decoded once per URL
+    TRACE.take_tier()
+
+    # known property page → skip homepage + search box (and Chrome, if we can)
+    url = URL_CACHE.get(address) if URL_CACHE else None
+    if url and HTTP:
+        f = _from_http(address, url)
+        if f:
+            return f
+    if url:
+        with TRACE.span("cached_page"):
+            driver.get(url)
+        price = _visible_price(driver) or _rec_price(page_record(driver, seen))
+        if price:
+            TRACE.tier("cache")
+        else:
+            URL_CACHE.drop(address)
+
+    if not price:
+        price = _search_price(driver, address, seen)
+        if price and URL_CACHE:
+            URL_CACHE.put(address, driver.current_url)
+
+    # other facts – from the record the price tiers already decoded
+    rec = page_record(driver, seen)
+    SESSION.measure(driver)
+    if ARCHIVE:         # raw page for reparse.py
+        ARCHIVE.put(address, seen["src"], driver.current_url)
+    return {"address": address, "price": price, "facts": _facts(rec),
+            "tier": TRACE.take_tier()}
+
+
+def parse_fetched(f: dict) -> dict:
+    return dict(_row(f["address"], f["price"], f["facts"]),
+                tier=f.get("tier", ""))
+
 
+def scrape_one(driver, address: str) -> dict:
+    return parse_fetched(fetch_one(driver, address))
+
+
+# ───────────────────────── runner ──────────────────────────
+def new_driver():
     opts = Options()
-    # opts.add_argument("--headless=new")   # uncomment for headless mode
     opts.add_argument("--disable-blink-features=AutomationControlled")
     opts.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36")
 
-    driver = webdriver.Chrome(options=opts); driver.maximize_window()
+    driver = SESSION.start(opts); driver.maximize_window()   # --profile / --headless / --block-heavy
+    return driver
 
-    try:
-        with open(IN_FILE, newline='', encoding='utf-8') as fin, \
-             open(OUT_FILE, 'w', newline='', encoding='utf-8') as fout:
-
-            rdr, wtr = csv.reader(fin), csv.writer(fout)
-            wtr.writerow(["address", "price", "lotSize(acres)",
-                          "yearBuilt", "livingArea(sqft)",
-                          "bedrooms", "bathrooms"])
-
-            rows = list(rdr)
-            if rows and rows[0][0].strip().lower() == "address":
-                rows = rows[1:]
-
-            for row in rows:
-                if not row: continue
-                addr = row[0].strip()
-                print(f"\n→ Scraping {addr} …")
-                data = scrape_one(driver, addr)
-                print("   ", data)             # live terminal output
-
-                wtr.writerow([data["address"], data["price"], data["lotSize"],
-                              data["yearBuilt"], data["livingArea"],
-                              data["bedrooms"], data["bathrooms"]])
-
-                time.sleep(random.uniform(*PAUSE_RANGE))
-    finally:
-        driver.quit()
+
+def main():
+    global BASE_URL, URL_CACHE, JS_HARVEST, HTTP, ARCHIVE
+    ap = argparse.ArgumentParser(description="Redfin → house_details_redfin.csv")
+    ap.add_argument("--in",  dest="in_file",  default="testing.csv")
+    ap.add_argument("--out", dest="out_file", default="house_details_redfin.csv")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="independent Chrome browsers scraping in parallel")
+    ap.add_argument("--base-url", default=BASE_URL,
+                    help="site root, e.g. http://127.0.0.1:8765 for fixture_server.py")
+    ap.add_argument("--url-cache", default="redfin_url_cache.json",
+                    help="address → property-URL cache file ('' to disable)")
+    ap.add_argument("--url-cache-ttl", type=float, default=90, metavar="DAYS")
+    ap.add_argument("--js-harvest", action="store_true",
+                    help="read the price with one injected script per page")
+    ap.add_argument("--ready-timeout", action="append", metavar="STAGE=SECS",
+                    help="upper bound for a readiness wait (cookie, search, "
+                         "second_enter, sold, details); repeatable")
+    ap.add_argument("--http-first", action="store_true",
+                    help="GET cached property URLs without Chrome; "
+                         "fall back to Selenium when fields are missing")
+    ap.add_argument("--fixed-tiers", action="store_true",
+                    help="always try search → second ENTER → sold instead of the "
+                         "order learned from the landing page")
+    ap.add_argument("--rpm", type=float, default=None,
+                    help="starting requests/min across all workers (default: --workers × 10)")
+    ap.add_argument("--max-rpm", type=float, default=60,
+                    help="ceiling the adaptive limiter may loosen up to")
+    ap.add_argument("--archive", default="page_archive",
+                    help="store every parsed page_source here for reparse.py ('' to disable)")
+    ap.add_argument("--profile", metavar="DIR",
+                    help="persistent Chrome profile per browser (DIR/w0, DIR/w1 …) – "
+                         "cookies and the consent banner survive restarts")
+    ap.add_argument("--warm-session", action="store_true",
+                    help="search from the current page instead of reloading the homepage; "
+                         "skip the cookie-banner check once handled")
+    ap.add_argument("--block-heavy", action="store_true",
+                    help="don't download images, fonts, media or map tiles")
+    ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--recycle-pages", type=int, default=250, metavar="N",
+                    help="restart each browser after N pages (0: never)")
+    ap.add_argument("--max-rss", type=float, default=2048, metavar="MB",
+                    help="restart a browser whose chromedriver + Chrome RSS exceeds this (0: off)")
+    ap.add_argument("--features", metavar="NPZ|PARQUET",
+                    help="finally write typed, validated columns (redfin_features.py) here")
+    ap.add_argument("--trace", metavar="JSONL",
+                    help="append per-address stage timings here and print p50/p95/p99")
+    ap.add_argument("--store", metavar="SQLITE",
+                    help="keep results in this SQLite store (upsert per address) and "
+                         "regenerate --out from it at the end instead of truncating it")
+    ap.add_argument("--refresh-days", type=float, default=30,
+                    help="with --store: only re-scrape homes older than this, or incomplete")
+    ap.add_argument("--shard", type=parse_shard, metavar="i/N",
+                    help="only this machine's stable slice of the input (0-based i); give "
+                         "each shard its own --out and combine them with merge_shards.py")
+    ap.add_argument("--no-dedupe", action="store_true",
+                    help="scrape every input row, even variants of the same property")
+    ap.add_argument("--pipeline", action="store_true",
+                    help="asyncio pipeline: browsers fetch while other processes parse")
+    ap.add_argument("--parse-workers", type=int, default=2,
+                    help="parser processes for --pipeline")
+    ap.add_argument("--queue", type=int, default=None,
+                    help="bound of each --pipeline queue (default: 2 × --workers)")
+    args = ap.parse_args()
+    if args.trace:
+        TRACE.enable(args.trace)
+    SESSION.profile, SESSION.warm = args.profile, args.warm_session
+    SESSION.block, SESSION.headless = args.block_heavy, args.headless
+    SESSION.measuring = bool(args.trace)          # page load ms + bytes per parsed page
+    set_ready_timeouts(args.ready_timeout)
+    LADDER.adaptive = not args.fixed_tiers
+    BASE_URL   = args.base_url.rstrip("/")
+    JS_HARVEST = args.js_harvest
+    rate = AdaptiveRateLimiter(
+        rpm=args.rpm or args.workers * 60 / (sum(PAUSE_RANGE) / 2), max_rpm=args.max_rpm)
+    round_trips = RoundTripCounter()
+    sup         = DriverSupervisor(new_driver, max_pages=args.recycle_pages,
+                                   max_rss_mb=args.max_rss)   # restarts + retry on a dead session
+    if args.url_cache:
+        URL_CACHE = URLCache(args.url_cache, ttl_days=args.url_cache_ttl)
+    if args.archive:
+        ARCHIVE = PageArchive(args.archive)
+    if args.http_first:
+        from redfin_http import HTTPFetcher
+        HTTP = HTTPFetcher(workers=args.workers)
+
+    IN_FILE, OUT_FILE = args.in_file, args.out_file
+
+    header = ["address", "price", "lotSize(acres)", "yearBuilt", "livingArea(sqft)",
+              "bedrooms", "bathrooms"]
+    store  = ResultStore(args.store, ttl_days=args.refresh_days) if args.store else None
+
+    with (contextlib.nullcontext() if store else
+          open(OUT_FILE, 'w', newline='', encoding='utf-8')) as fout:
+
+        wtr = csv.writer(fout) if fout else None
+        if wtr:
+            wtr.writerow(header)
+
+        def save(addr, data):              # called in input order
+            print("   ", data)             # live terminal output
+            if store:
+                store.upsert(addr, data, data.get("tier", ""))
+                return
+            wtr.writerow([addr, data.get("price", ""), data.get("lotSize", ""),
+                          data.get("yearBuilt", ""), data.get("livingArea", ""),
+                          data.get("bedrooms", ""), data.get("bathrooms", "")])
+
+        # streamed – the input never sits in memory; --store skips fresh homes
+        addrs   = read_addresses(IN_FILE, args.shard)
+        is_done = store.is_fresh if store else None
+        index   = AddressIndex()
+        if args.no_dedupe:
+            on_result = save
+            if store:
+                addrs = (a for a in addrs if not is_done(a))
+        else:                              # one scrape per property, result → every variant
+            addrs, on_result = index.stream(addrs, is_done), index.fan_out(save)
+        if args.pipeline:
+            fetch_fn = sup.wrap(round_trips.wrap(rate.wrap(TRACE.wrap(fetch_one),
+                                                           probe=page_head_text)))
+            run_pipeline(addrs, fetch_fn, parse_fetched, sup.new_driver, on_result,
+                         workers=args.workers, parse_workers=args.parse_workers,
+                         queue_size=args.queue)
+        else:
+            scrape_fn = sup.wrap(round_trips.wrap(rate.wrap(TRACE.wrap(scrape_one),
+                                                            probe=page_head_text)))
+            run_pool(addrs, scrape_fn, sup.new_driver, on_result,
+                     workers=args.workers, pause_range=None)
+        index.flush(save)
+        if index.rows:
+            print(index.report())
+
+    if store:
+        n = store.export_csv(OUT_FILE, header)
+        print(store.report()); print(f"   {n} priced rows exported → {OUT_FILE}")
+        store.close()
+    if URL_CACHE:
+        URL_CACHE.close()
+        print(URL_CACHE.report())
+    if HTTP:
+        print(HTTP.report())
+    if ARCHIVE:
+        print(ARCHIVE.report())
+    print(rate.report())
+    print(round_trips.report())
+    print(WAITS.report())
+    print(SESSION.report())
+    print(LADDER.report())
+    print(sup.report())
+    if TRACE.on:
+        print(TRACE.summary()); TRACE.close()
+    if args.features:                  # typed columnar copy for modeling
+        from redfin_features import write_features
+        print(write_features(OUT_FILE, args.features))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+"""
+redfin_address.py   –   2025-08-07
+Turn a free-typed address into a stable key for indexes / de-duplication.
+
+    normalize_address('12 Main Street, Apt #4, Saratoga Springs, New York 12866-1234')
+        → '12 main st unit 4 saratoga springs ny 12866'
+
+Street suffixes, directionals, unit designators and state names are
+canonicalized (USPS abbreviations), ZIP+4 is cut to five digits.
+AddressIndex collapses the variants of one property in an input stream
+so it is scraped once and the result fanned back out to every original row.
+"""
+
+import re, threading
+from collections import OrderedDict
+from functools import lru_cache
+
+_PUNCT = re.compile(r"[^\w\s,#]")
+_ZIP   = re.compile(r"^(\d{5})(?:\d{4})?$")
+
+_SUFFIX = dict(
+    street="st", str="st", avenue="ave", av="ave", avn="ave", road="rd", drive="dr",
+    drv="dr", lane="ln", court="ct", place="pl", boulevard="blvd", boul="blvd",
+    circle="cir", terrace="ter", parkway="pkwy", pky="pkwy", highway="hwy",
+    square="sq", trail="trl", alley="aly", crescent="cres", expressway="expy",
+    freeway="fwy", heights="hts", point="pt", ridge="rdg", route="rte",
+    turnpike="tpke", extension="ext", plaza="plz", landing="lndg", crossing="xing",
+    cove="cv", hollow="holw", junction="jct", manor="mnr", meadow="mdw", center="ctr")
+_SUFFIXES = set(_SUFFIX.values()) | {"way", "loop", "run", "path", "pike", "row", "walk", "rue"}
+_DIRECTION = dict(north="n", south="s", east="e", west="w", northeast="ne",
+                  northwest="nw", southeast="se", southwest="sw")
+_UNIT = {"unit", "apt", "apartment", "ste", "suite", "no", "#", "rm", "room", "fl", "floor", "lot"}
+_STATES = dict(s.replace("_", " ").split("=") for s in (
+    "alabama=al alaska=ak arizona=az arkansas=ar california=ca colorado=co connecticut=ct "
+    "delaware=de florida=fl georgia=ga hawaii=hi idaho=id illinois=il indiana=in iowa=ia "
+    "kansas=ks kentucky=ky louisiana=la maine=me maryland=md massachusetts=ma michigan=mi "
+    "minnesota=mn mississippi=ms missouri=mo montana=mt nebraska=ne nevada=nv "
+    "new_hampshire=nh new_jersey=nj new_mexico=nm new_york=ny north_carolina=nc "
+    "north_dakota=nd ohio=oh oklahoma=ok oregon=or pennsylvania=pa rhode_island=ri "
+    "south_carolina=sc south_dakota=sd tennessee=tn texas=tx utah=ut vermont=vt "
+    "virginia=va washington=wa west_virginia=wv wisconsin=wi wyoming=wy "
+    "district_of_columbia=dc").split())
+
+
+def _tokens(addr):
+    return _PUNCT.sub(" ", addr.lower().replace("#", " # ").replace(",", " , ")).split()
+
+
+@lru_cache(maxsize=65_536)
+def parse_address(addr: str) -> tuple:
+    """→ (street, city, state, zip); street includes the unit. Missing parts are ''."""
+    tok = _tokens(addr)
+    # street ends at the first suffix after "<number> <name>", or at the first comma
+    end = next((i for i, t in enumerate(tok) if t == ","), len(tok))
+    if tok and tok[0][:1].isdigit():
+        end = next((i + 1 for i in range(2, end) if _SUFFIX.get(tok[i], tok[i]) in _SUFFIXES), end)
+    street = tok[:end]
+    if street:                                      # only the suffix itself: '5 Court St'
+        street[-1] = _SUFFIX.get(street[-1], street[-1])
+    if end > 3:                                     # '12 North Main St', not '12 West Ave'
+        street[1] = _DIRECTION.get(street[1], street[1])
+    rest   = tok[end:]
+
+    # '12 Main St N, …' – a directional only counts before the first comma
+    if rest and _DIRECTION.get(rest[0], rest[0]) in _DIRECTION.values() \
+            and (len(rest) == 1 or rest[1] == "," or rest[1] in _UNIT):
+        street.append(_DIRECTION.get(rest[0], rest[0])); rest.pop(0)
+    while rest and rest[0] == ",":
+        rest.pop(0)
+    if rest and rest[0] in _UNIT:                   # 'apt 4', '# 4', 'unit b', 'ste #2'
+        while rest and rest[0] in _UNIT:
+            rest.pop(0)
+        if rest and rest[0] != ",":
+            street += ["unit", rest.pop(0)]
+
+    loc = [t for t in rest if t != ","]
+    zip5 = ""
+    if loc and _ZIP.match(loc[-1]):
+        zip5 = _ZIP.match(loc.pop()).group(1)
+    elif len(loc) >= 2 and _ZIP.match(loc[-2]) and len(loc[-1]) == 4 and loc[-1].isdigit():
+        loc.pop(); zip5 = loc.pop()                 # '12866-1234' → '12866 1234'
+    state = ""
+    for n in (3, 2, 1):
+        name = " ".join(loc[-n:])
+        if len(loc) >= n and (name in _STATES or (n == 1 and name in _STATES.values())):
+            state = _STATES.get(name, name); del loc[-n:]
+            break
+    return " ".join(street), " ".join(loc), state, zip5
+
+
+def normalize_address(addr: str) -> str:
+    """'12 Main Street, Saratoga Springs NY' → '12 main st saratoga springs ny'."""
+    return " ".join(p for p in parse_address(addr) if p)
+
+
+# ─────────────────────────── de-duplication ───────────────────────────
+_SKIP = "skip"                                      # property done in an earlier run
+
+
+def _compatible(a, b):
+    """Two (city, state, zip) localities that may name the same place."""
+    if a[2] and b[2]:
+        return a[2] == b[2]
+    if a[0] and b[0]:
+        return a[0] == b[0] and (not a[1] or not b[1] or a[1] == b[1])
+    return not (a[1] and b[1]) or a[1] == b[1]
+
+
+class AddressIndex:
+    """
+    Streaming de-dup: stream() yields the first variant of every new property
+    and folds later variants into it – '12 Main Street, Saratoga Springs NY'
+    joins '12 Main St Saratoga Springs NY 12866'. A bare '12 Main St' joins
+    only while its street has a single known locality, and the other way
+    round a located variant joins an earlier bare '12 Main St' that is its
+    street's only entry (which then takes that locality) – so the order of
+    the input doesn't change the scrape count. fan_out(save) writes
+    a property's result to every variant seen so far, and to later ones as
+    they turn up (from a bounded memo of recent results; a variant whose
+    property fell out of it is simply scraped on its own).
+    Memory is one small entry per property, never the input itself.
+    """
+
+    def __init__(self, memo=100_000):
+        self.rows = self.scrapes = self.skipped = 0
+        self._streets = {}                          # street → [[locality, prop], …]
+        self._props   = {}                          # representative → prop, until its result
+        self._memo    = OrderedDict()               # representative → result (LRU)
+        self._late    = []                          # (addr, data) waiting for the next save
+        self._max     = memo
+        self._lock    = threading.Lock()
+
+    def _place(self, addr):
+        """→ (prop, is_new). prop = [representative, variants | None (done) | _SKIP]."""
+        street, *loc = parse_address(addr)
+        loc   = tuple(loc)
+        props = self._streets.setdefault(street, [])
+        if any(loc):
+            for e in props:
+                if any(e[0]) and _compatible(e[0], loc):
+                    e[0] = tuple(x or y for x, y in zip(e[0], loc))
+                    return e[1], False
+            if len(props) == 1 and not any(props[0][0]):   # lone bare street → located now
+                props[0][0] = loc
+                return props[0][1], False
+        else:
+            located = [e for e in props if any(e[0])]
+            e = located[0] if len(located) == 1 else next((e for e in props if not any(e[0])), None)
+            if e:
+                return e[1], False
+        prop = [addr, []]
+        props.append([loc, prop])
+        return prop, True
+
+    def stream(self, addrs, is_done=None):
+        """One address per property to scrape; is_done(addr) → skip (earlier run)."""
+        for addr in addrs:
+            self.rows += 1
+            with self._lock:
+                prop, new = self._place(addr)
+                if not new:
+                    if isinstance(prop[1], list):   # still being scraped
+                        prop[1].append(addr)
+                        continue
+                    data = self._memo.get(prop[0]) if prop[1] is None else None
+                    if data is not None:
+                        self._late.append((addr, data))
+                        continue
+                    if is_done and is_done(addr):
+                        self.skipped += 1
+                        continue
+                    prop = [addr, []]               # scrape this variant on its own
+                elif is_done and is_done(addr):
+                    prop[1] = _SKIP; self.skipped += 1
+                    continue
+                self._props[addr] = prop
+                self.scrapes += 1
+            yield addr
+
+    def fan_out(self, on_result):
+        """on_result(addr, data) wrapper: one property's result → every original row."""
+        def run(rep, data):
+            with self._lock:
+                prop = self._props.pop(rep, None)
+                variants = prop[1] if prop else []
+                if prop:
+                    prop[1] = None
+                self._memo[rep] = data
+                if len(self._memo) > self._max:
+                    self._memo.popitem(last=False)
+                late, self._late = self._late, []
+            for addr in [rep] + variants:
+                on_result(addr, data)
+            for addr, d in late:
+                on_result(addr, d)
+        return run
+
+    def flush(self, on_result):
+        """Variants that turned up after the last result was written."""
+        with self._lock:
+            late, self._late = self._late, []
+        for addr, data in late:
+            on_result(addr, data)
+
+    @property
+    def avoided(self) -> int:
+        return self.rows - self.scrapes - self.skipped
+
+    def report(self) -> str:
+        return (f"Address de-dup: {self.rows} input rows → {self.scrapes} scrapes, "
+                f"{self.skipped} already done, {self.avoided} scrapes avoided")
@@ -0,0 +1,80 @@
+"""
+redfin_archive.py   –   2025-08-07
+Compressed, content-addressed store of the page_source each address was
+parsed from, so extractor fixes can be re-applied offline (reparse.py)
+instead of re-scraping.
+
+    <root>/objects/ab/ab12…ef.html.gz    gzip of the page, named by sha256
+    <root>/index.jsonl                   {"address", "fetched_at", "sha", "bytes", "url"
+                                          [, "pf_txt"]}
+
+`pf_txt` is B2's Public-facts bullet text, read from the live accordion
+after page_source was taken – the HTML alone doesn't have it.
+
+Identical pages share one object. No selenium import here.
+"""
+
+import gzip, hashlib, json, os, threading
+from datetime import datetime
+
+
+class PageArchive:
+    def __init__(self, root="page_archive"):
+        self.root  = root
+        self.index = os.path.join(root, "index.jsonl")
+        self._lock = threading.Lock()
+        self.stored = self.deduped = 0
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def _obj(self, sha):
+        return os.path.join(self.root, "objects", sha[:2], sha + ".html.gz")
+
+    def put(self, address: str, html: str, url: str = "", pf_txt: str = "") -> str:
+        data = html.encode("utf-8")
+        sha  = hashlib.sha256(data).hexdigest()
+        path = self._obj(sha)
+        if os.path.exists(path):
+            self.deduped += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self.stored += 1
+        entry = {"address": address,
+                 "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                 "sha": sha, "bytes": len(data), "url": url}
+        if pf_txt:
+            entry["pf_txt"] = pf_txt
+        line = json.dumps(entry)
+        with self._lock, open(self.index, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return sha
+
+    def report(self) -> str:
+        return f"Page archive: {self.stored} new pages, {self.deduped} duplicates → {self.root}"
+
+
+# ─────────────────────────── readers ───────────────────────────
+def iter_index(root, latest_only=True):
+    """Index entries in file order; latest_only keeps the newest fetch per address."""
+    path = os.path.join(root, "index.jsonl")
+    if not latest_only:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    latest = {}                                   # address → newest entry, first-seen order
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                e = json.loads(line)
+                latest[e["address"]] = e
+    yield from latest.values()
+
+
+def load_page(root, sha) -> str:
+    with gzip.open(os.path.join(root, "objects", sha[:2], sha + ".html.gz"), "rb") as f:
+        return f.read().decode("utf-8")
@@ -0,0 +1,241 @@
+"""
+redfin_browser.py   –   2025-08-07
+Browser-side helpers shared by B2.py and redfin-gemini.py.
+
+Every find_element / get_attribute / click / WebDriverWait poll is its own
+HTTP round-trip to chromedriver. `harvest()` replaces those chatty chains
+with ONE execute_async_script call: the page itself waits for the price
+widget, expands “Public facts”, waits for the bullets and hands everything
+back as a single JSON object. `RoundTripCounter` proves the difference.
+
+`wait_usable()` / `wait_for()` replace the fixed time.sleep()s: they
+return as soon as the page is usable and book the time saved against the
+sleep they replaced in WAITS.
+"""
+
+import threading, time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from redfin_extract import extract
+from redfin_trace import TRACE
+
+PRICE_CSS = "[data-testid='avm-price'] .value, .statsValue.price"
+
+# upper bounds (seconds) per readiness wait – override with --ready-timeout stage=secs
+READY_TIMEOUTS = {
+    "cookie":       3,     # banner gone after the click            (was sleep 1)
+    "search":      10,     # first ENTER → result page usable       (was sleep 3)
+    "second_enter": 6,     # second ENTER → result page usable      (was sleep 3)
+    "sold":         8,     # include=sold page usable               (was sleep 4–5)
+    "details":      2,     # Public-facts caret expanded            (was sleep 0.2–0.3)
+}
+READY_GRACE = 1.0          # page complete but no price/JSON yet → hold out this long
+
+HARVEST_JS = r"""
+const priceMs = arguments[0], factsMs = arguments[1], css = arguments[2];
+const done = arguments[arguments.length - 1];
+const t0 = Date.now();
+
+function publicFacts() {
+  const h3 = [...document.querySelectorAll('h3')]
+             .find(h => /public facts/i.test(h.textContent));
+  return h3 ? {h3: h3, box: h3.closest('.expandableSection') || h3.parentElement} : null;
+}
+function bullets(box) {
+  return [...box.querySelectorAll('li')].map(li => li.innerText.trim()).filter(Boolean);
+}
+function finish(el) {
+  const out = {price: el ? el.innerText.trim() : '',
+               testid: (el && el.parentElement && el.parentElement.getAttribute('data-testid')) || '',
+               facts: []};
+  const pf = publicFacts();
+  if (!pf) return done(out);
+  const cls = pf.box.className || '';
+  if (cls.includes('collapsed') && !cls.includes('expanded')) pf.h3.click();
+  const t1 = Date.now();
+  (function poll() {
+    const got = bullets(pf.box);
+    if (got.length || Date.now() - t1 > factsMs) { out.facts = got; done(out); }
+    else setTimeout(poll, 50);
+  })();
+}
+(function waitPrice() {
+  const el = document.querySelector(css);
+  if (el || Date.now() - t0 > priceMs) finish(el);
+  else setTimeout(waitPrice, 100);
+})();
+"""
+
+
+def harvest(driver, price_secs=7, facts_secs=4) -> dict:
+    """
+    One round-trip DOM harvest → {"price": "$…", "testid": "avm-price"|…,
+    "facts": ["Lot Size: …", …]}. The result is also kept on the driver
+    (last_harvest) so the facts can be reused without another call.
+    """
+    budget = price_secs + facts_secs + 5
+    if getattr(driver, "_rf_script_timeout", None) != budget:
+        driver.set_script_timeout(budget)
+        driver._rf_script_timeout = budget
+    h = driver.execute_async_script(HARVEST_JS, int(price_secs * 1000),
+                                    int(facts_secs * 1000), PRICE_CSS) or {}
+    h = {"price": h.get("price") or "", "testid": h.get("testid") or "",
+         "facts": list(h.get("facts") or [])}
+    driver._rf_harvest = h
+    return h
+
+
+def last_harvest(driver):
+    """Harvest from the page we are on (None once the scrape moved on)."""
+    return getattr(driver, "_rf_harvest", None)
+
+
+def forget_harvest(driver):
+    driver._rf_harvest = None
+
+
+def page_source(driver, memo=None) -> str:
+    """
+    driver.page_source, timed and byte-counted for the trace. With a `memo`
+    dict (one per fetch) a page is pulled once per URL and then reused.
+    """
+    url = driver.current_url if memo is not None else None
+    if memo and memo.get("url") == url:
+        return memo["src"]
+    with TRACE.span("page_source"):
+        src = driver.page_source
+    TRACE.add_bytes(len(src))
+    if memo is not None:
+        memo["url"], memo["src"] = url, src
+        memo.pop("rec", None)
+    return src
+
+
+def page_record(driver, memo) -> dict:
+    """extract() of the current page, decoded once per page within one fetch (`memo`)."""
+    src = page_source(driver, memo)
+    if "rec" not in memo:
+        with TRACE.span("parse"):
+            memo["rec"] = extract(src)
+    return memo["rec"]
+
+
+def page_head_text(driver) -> str:
+    """Title + first screen of text – enough to spot a captcha / block page."""
+    return driver.execute_script(
+        "return document.title + '\\n' + "
+        "(document.body ? document.body.innerText.slice(0, 1500) : '');") or ""
+
+
+# ─────────────────────── readiness waits ───────────────────────
+_PROBE_JS = """
+return [document.readyState, location.href, !!document.querySelector(arguments[0]),
+        [...document.scripts].some(s => s.text.indexOf('addressSectionInfo') >= 0 ||
+                                        s.text.indexOf('avmText') >= 0)];
+"""
+
+
+class WaitLedger:
+    """Time actually spent in readiness waits vs the fixed sleeps they replaced."""
+
+    def __init__(self):
+        self.waited = self.replaced = 0.0
+        self.waits = self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def add(self, waited, replaced, timed_out=False):
+        with self._lock:
+            self.waited += waited; self.replaced += replaced
+            self.waits  += 1;      self.timeouts += timed_out
+
+    def report(self) -> str:
+        return (f"Readiness waits: {self.waits} waits, {self.waited:.1f} s spent vs "
+                f"{self.replaced:.1f} s of fixed sleeps → saved {self.replaced - self.waited:.1f} s "
+                f"({self.timeouts} hit their upper bound)")
+
+
+WAITS = WaitLedger()
+
+
+def wait_for(driver, stage, cond, replaces=0.0, poll=0.1):
+    """WebDriverWait(cond) bounded by READY_TIMEOUTS[stage]; never raises."""
+    t0, timed_out = time.monotonic(), False
+    try:
+        WebDriverWait(driver, READY_TIMEOUTS[stage], poll_frequency=poll,
+                      ignored_exceptions=(WebDriverException,)).until(cond)
+    except TimeoutException:
+        timed_out = True
+    WAITS.add(time.monotonic() - t0, replaces, timed_out)
+    return not timed_out
+
+
+def wait_usable(driver, stage, replaces=0.0, old_url=None):
+    """
+    Block until the page is usable: (URL moved away from old_url) and
+    document.readyState == 'complete' and the price widget or the
+    embedded JSON is present – or READY_GRACE after 'complete' when the
+    page simply has neither (search results, off-market …).
+    """
+    complete_at = None
+
+    def usable(d):
+        nonlocal complete_at
+        state, url, price, payload = d.execute_script(_PROBE_JS, PRICE_CSS)
+        if (old_url and url == old_url) or state != "complete":
+            return False
+        if price or payload:
+            return True
+        complete_at = complete_at or time.monotonic()
+        return time.monotonic() - complete_at >= READY_GRACE
+
+    return wait_for(driver, stage, usable, replaces, poll=0.2)
+
+
+def set_ready_timeouts(specs):
+    """['search=6', 'sold=4'] → READY_TIMEOUTS (used for --ready-timeout)."""
+    for spec in specs or ():
+        stage, _, secs = spec.partition("=")
+        if stage not in READY_TIMEOUTS:
+            raise ValueError(f"unknown readiness stage {stage!r} – one of {', '.join(READY_TIMEOUTS)}")
+        READY_TIMEOUTS[stage] = float(secs)
+
+
+# ─────────────────────── round-trip accounting ───────────────────────
+class RoundTripCounter:
+    """Counts WebDriver commands (= chromedriver HTTP round-trips) per address."""
+
+    def __init__(self):
+        self.commands = self.addresses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def attach(driver):
+        if getattr(driver, "_rf_round_trips", None) is not None:
+            return
+        driver._rf_round_trips = 0
+        execute = driver.execute                    # every command funnels through here
+
+        def counting_execute(*a, **kw):
+            driver._rf_round_trips += 1
+            return execute(*a, **kw)
+        driver.execute = counting_execute
+
+    def wrap(self, scrape_fn):
+        """scrape_fn(driver, addr) → same, with its round-trips tallied."""
+        def run(driver, addr):
+            self.attach(driver)
+            n0 = driver._rf_round_trips
+            try:
+                return scrape_fn(driver, addr)
+            finally:
+                with self._lock:
+                    self.commands  += driver._rf_round_trips - n0
+                    self.addresses += 1
+        return run
+
+    def report(self) -> str:
+        avg = self.commands / self.addresses if self.addresses else 0
+        return (f"WebDriver round-trips: {self.commands} over {self.addresses} "
+                f"addresses ({avg:.1f} per address)")
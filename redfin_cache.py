@@ -0,0 +1,97 @@
+"""
+redfin_cache.py   –   2025-08-07
+Persistent  address → property-URL  cache.
+
+Once an address has been resolved through the homepage search box, the
+final /home/ URL is remembered so the next run can driver.get() it
+directly. Entries expire after `ttl_days`; past `max_entries` the least
+recently used ones are evicted. Stored as one JSON file (temp + rename),
+rewritten in batches – every `save_every` changes or `save_secs` seconds,
+and on close() – not on every put(): at 50k entries a per-address
+rewrite costs more than the search it saves. A crash loses at most the
+last batch, which just means a few more searches next run.
+"""
+
+import json, os, threading, time
+from collections import OrderedDict
+
+from redfin_address import normalize_address
+
+DAY = 86_400
+
+
+class URLCache:
+    def __init__(self, path="redfin_url_cache.json", ttl_days=90, max_entries=50_000,
+                 save_every=200, save_secs=60):
+        self.path, self.ttl, self.max = path, ttl_days * DAY, max_entries
+        self.save_every, self.save_secs = save_every, save_secs
+        self.hits = self.misses = self.expired = self.stale = self.saves = 0
+        self._dirty, self._saved_at = 0, time.monotonic()
+        self._lock = threading.Lock()
+        self._d = OrderedDict()                     # key → [url, stored_at]  (LRU order)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for k, v in json.load(f).items():   # re-keyed: older files used a plainer key
+                    self._d[normalize_address(k)] = v
+
+    # ─────────────────────────── lookups ───────────────────────────
+    def get(self, address: str):
+        key = normalize_address(address)
+        with self._lock:
+            hit = self._d.get(key)
+            if hit and time.time() - hit[1] > self.ttl:
+                del self._d[key]; self.expired += 1
+                hit = None
+            if hit is None:
+                self.misses += 1
+                return None
+            self._d.move_to_end(key)
+            self.hits += 1
+            return hit[0]
+
+    # ─────────────────────────── updates ───────────────────────────
+    def put(self, address: str, url: str):
+        if "/home/" not in url:                     # only real property pages
+            return
+        with self._lock:
+            key = normalize_address(address)
+            self._d[key] = [url, time.time()]
+            self._d.move_to_end(key)
+            while len(self._d) > self.max:
+                self._d.popitem(last=False)
+            self._changed()
+
+    def drop(self, address: str):
+        """Cached URL led nowhere (listing moved / page changed)."""
+        with self._lock:
+            if self._d.pop(normalize_address(address), None):
+                self.stale += 1
+                self._changed()
+
+    def close(self):
+        """Write what the last batch left unsaved."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _changed(self):
+        """Caller holds the lock."""
+        self._dirty += 1
+        if (self._dirty >= self.save_every
+                or time.monotonic() - self._saved_at >= self.save_secs):
+            self._save()
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._d, f)
+        os.replace(tmp, self.path)
+        self._dirty, self._saved_at = 0, time.monotonic()
+        self.saves += 1
+
+    def report(self) -> str:
+        n = self.hits + self.misses
+        rate = f"{100 * self.hits / n:.0f}%" if n else "–"
+        return (f"URL cache: {self.hits} hits / {self.misses} misses ({rate}), "
+                f"{self.expired} expired, {self.stale} stale, {len(self._d)} entries, "
+                f"{self.saves} saves")
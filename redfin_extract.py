@@ -0,0 +1,190 @@
+"""
+redfin_extract.py   –   2025-08-07
+Single-pass extraction of price + home facts from a Redfin page_source.
+
+One regex scan finds the embedded JSON markers (`addressSectionInfo`,
+`avmText`, status-banner `segments`); each hit is decoded with
+json.raw_decode right where it sits. Fields still missing after that
+come from the (pre-compiled) visible-HTML regexes. The page-wide JSON-key
+regexes only run when addressSectionInfo did not decode – with the
+section in hand they would pick up "similar homes" values instead.
+
+No selenium import here – the offline tools rely on that.
+"""
+
+import html, json, re
+
+ACRES_PER_SQFT = 43_560
+
+FIELDS = ("priceLabel", "price", "livingArea", "lotSqFt", "lotAcres",
+          "yearBuilt", "beds", "baths")
+
+_MARKERS = re.compile(r'"(addressSectionInfo|avmText|segments)"\s*:\s*')
+_DECODER = json.JSONDecoder()
+_MONEY   = re.compile(r"\$\s*([0-9][0-9,]*)")
+_SOLD    = re.compile(r"FOR\s+\$([0-9,]+)")
+
+# price widgets as served in the HTML (browserless fetch has no live DOM)
+_HTML_PRICE = (
+    ("Redfin Estimate", re.compile(r'data-testid="avm-price"[^>]*>\s*<div class="value"[^>]*>\s*(\$[0-9,]+)')),
+    ("List Price",      re.compile(r'class="statsValue price"[^>]*>\s*(\$[0-9,]+)')),
+)
+
+# fall-back 1: same keys anywhere in the page (payload not decodable / elsewhere)
+_KEY_RX = (
+    ("livingArea", re.compile(r'"sqFt(?:Finished)?"\s*:\s*(?:\{[^{}]*?"value"\s*:\s*)?([0-9][0-9,]*)'), int),
+    ("lotSqFt",    re.compile(r'"lotSize"\s*:\s*(?:\{[^{}]*?"value"\s*:\s*)?([0-9][0-9,]*)'), int),
+    ("yearBuilt",  re.compile(r'"yearBuilt"\s*:\s*(?:\{[^{}]*?"value"\s*:\s*)?([0-9]{4})'), int),
+    ("beds",       re.compile(r'"beds"\s*:\s*([0-9]+)'), int),
+    ("baths",      re.compile(r'"baths"\s*:\s*([0-9.]+)'), float),
+)
+
+# fall-back 2: visible HTML text
+_HTML_RX = (
+    ("livingArea", re.compile(r"([\d,]+)\s+square\s+foot", re.I), int),
+    ("lotAcres",   re.compile(r"([0-9.]+)\s*acres?\s+lot", re.I), float),
+    ("yearBuilt",  re.compile(r"Year Built[^0-9]*([0-9]{4})", re.I), int),
+    ("beds",       re.compile(r"(\d+)\s+bed(?:room)?s?", re.I), int),
+    ("baths",      re.compile(r"(\d+(?:\.\d)?)\s+bath", re.I), float),
+)
+
+
+def _num(v, cast=int):
+    """JSON value → number; unwraps Redfin's {"displayLevel":…, "value": n}."""
+    if isinstance(v, dict):
+        v = v.get("value")
+    if isinstance(v, str):
+        v = v.replace(",", "")
+    try:
+        return cast(float(v)) if cast is int else cast(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _decode(src, pos):
+    try:
+        return _DECODER.raw_decode(src, pos)[0]
+    except ValueError:
+        return None
+
+
+def _from_section(rec, info):
+    if not isinstance(info, dict):
+        return
+    rec["livingArea"] = _num(info.get("sqFtFinished")) or _num(info.get("sqFt"))
+    rec["lotSqFt"]    = _num(info.get("lotSize"))
+    rec["yearBuilt"]  = _num(info.get("yearBuilt"))
+    rec["beds"]       = _num(info.get("beds"))
+    rec["baths"]      = _num(info.get("baths"), float)
+
+
+def _from_segments(segs):
+    if not isinstance(segs, list):
+        return None
+    for seg in segs:
+        m = _SOLD.search(seg.get("text", "") if isinstance(seg, dict) else str(seg))
+        if m:
+            return m.group(1)
+    return None
+
+
+# ─────────────────────────── public API ───────────────────────────
+def extract(src: str) -> dict:
+    """
+    page_source → {priceLabel, price ('$426,090'), livingArea, lotSqFt,
+                   lotAcres, yearBuilt, beds, baths}; missing → None.
+    """
+    rec = dict.fromkeys(FIELDS)
+    seen = set()
+
+    for m in _MARKERS.finditer(src):
+        key = m.group(1)
+        if key in seen:
+            continue
+        val = _decode(src, m.end())
+        if key == "addressSectionInfo" and isinstance(val, dict):
+            _from_section(rec, val); seen.add(key)
+        elif key == "avmText" and isinstance(val, str):
+            p = _MONEY.search(html.unescape(val))
+            if p:                               # estimate outranks the sold banner
+                rec["priceLabel"], rec["price"] = "Redfin Estimate", f"${p.group(1)}"
+                seen.add(key)
+        elif key == "segments":
+            sold = _from_segments(val)
+            if sold:
+                seen.add(key)
+                if rec["price"] is None:
+                    rec["priceLabel"], rec["price"] = "Sold Price", f"${sold}"
+        if len(seen) == 3:
+            break
+
+    if rec["price"] is None:
+        for label, rx in _HTML_PRICE:
+            m = rx.search(src)
+            if m:
+                rec["priceLabel"], rec["price"] = label, m.group(1)
+                break
+
+    if "addressSectionInfo" not in seen:    # page-wide JSON keys would hit "similar homes"
+        _fill(rec, src, _KEY_RX)            # once this home's own section decoded
+    if rec["lotSqFt"] is None:
+        _fill(rec, src, _HTML_RX)
+    else:
+        _fill(rec, src, tuple(r for r in _HTML_RX if r[0] != "lotAcres"))
+    return rec
+
+
+def _fill(rec, src, table):
+    for field, rx, cast in table:
+        if rec[field] is None:
+            m = rx.search(src)
+            if m:
+                rec[field] = _num(m.group(1), cast)
+
+
+# Public-facts bullet text (B2 reads it from the live accordion) → B2 row keys
+PF_RX = (
+    ("yearBuilt",  re.compile(r'Year Built\s*[:\-]?\s*([0-9]{4})', re.I), int),
+    ("livingArea", re.compile(r'Sq\.?\s*Ft\.?\s*[:\-]?\s*([0-9,]+)', re.I), int),
+    ("bedrooms",   re.compile(r'Beds?\s*[:\-]?\s*([0-9]+)', re.I), int),
+    ("bathrooms",  re.compile(r'Baths?\s*[:\-]?\s*([0-9\.]+)', re.I), float),
+)
+PF_LOT = re.compile(r'Lot Size\s*[:\-]?\s*([0-9,\.]+)\s*(acres|square feet)?', re.I)
+
+
+def public_facts(d, txt):
+    """Fill the None values of a B2 facts dict (lotSize in acres …) from bullet text."""
+    if not txt:
+        return d
+    if d["lotSize"] is None:
+        m = PF_LOT.search(txt)
+        if m:
+            num  = float(m.group(1).replace(",", ""))
+            unit = (m.group(2) or "").strip().lower()   # "acres" / "square feet" / ""
+            d["lotSize"] = round(num / ACRES_PER_SQFT, 3) if unit == "square feet" else num
+    for key, rx, cast in PF_RX:
+        if d[key] is None:
+            m = rx.search(txt)
+            if m:
+                d[key] = cast(m.group(1).replace(",", ""))
+    return d
+
+
+def cell(v, style="gemini") -> str:
+    """
+    Fact → CSV text exactly as each runner writes it (reparse.py matches
+    both): gemini '%g' (2.0 → '2'), B2 str() of a set value (2.0 → '2.0',
+    0 → ''); missing → ''.
+    """
+    if style == "b2":
+        return str(v) if v else ""
+    if v is None:
+        return ""
+    return str(v) if isinstance(v, int) else f"{v:g}"
+
+
+def lot_acres(rec, ndigits=2):
+    """Lot size in acres – JSON square feet first, visible 'x acre lot' second."""
+    if rec["lotSqFt"] is not None:
+        return round(rec["lotSqFt"] / ACRES_PER_SQFT, ndigits)
+    return rec["lotAcres"]
@@ -0,0 +1,159 @@
+"""
+redfin_features.py   –   2025-08-07
+Typed, validated columns from a results CSV – the notebook clean-up,
+done once, column-wise in NumPy:
+
+    python redfin_features.py house_details_redfin.csv homes.npz
+    python redfin_features.py house_details_redfin.csv homes.parquet   # needs pyarrow
+    cols = redfin_features.load("homes.npz")        # {name: ndarray}
+
+Both scripts' headers are accepted (lotSize / lotSize(acres) …). Strings
+become float arrays (NaN = missing); price per sqft and age are derived;
+every row gets a `flags` bitmask (names in FLAGS / the file's `flag_names`)
+for values out of range, price-per-sqft outliers (median / MAD on the log,
+|z| > 3.5) and lots big enough to be square feet by mistake – flagged
+only, since a 150-acre farm is real. The runners write the same file at
+the end with --features.
+"""
+
+import argparse, csv, os, time
+from datetime import date
+
+import numpy as np
+
+COLUMNS = ("price", "lotSize", "yearBuilt", "livingArea", "bedrooms", "bathrooms")
+RANGES  = {                                         # plausible for Saratoga County homes
+    "price":      (10_000, 20_000_000),
+    "livingArea": (200, 20_000),
+    "yearBuilt":  (1700, date.today().year + 1),
+    "bedrooms":   (0, 20),
+    "bathrooms":  (0, 20),
+    "lotAcres":   (0, 1_000),
+}
+LOT_SUSPECT   = 100                                 # acres; above this may be square feet
+OUTLIER_Z     = 3.5
+FLAGS = ("no_price", "price_range", "sqft_range", "year_range", "beds_range",
+         "baths_range", "lot_range", "ppsf_outlier", "lot_suspect")
+
+
+# ─────────────────────────── load + coerce ───────────────────────────
+def read_columns(path) -> dict:
+    """CSV → {column: str ndarray}; short rows padded, header '(unit)' suffixes dropped."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rdr    = csv.reader(f)
+        header = [h.split("(")[0] for h in next(rdr, [])]
+        n      = len(header)
+        rows   = [r if len(r) == n else (r + [""] * n)[:n]
+                  for r in rdr if r and r[0].strip()]
+    table = np.array(rows, dtype=str).reshape(len(rows), n)   # one conversion, then views
+    return {h: table[:, i] for i, h in enumerate(header)}
+
+
+def to_float(a):
+    """'$1,249,000' / '2.5' / '' → float64 ndarray, NaN where not a number."""
+    if not a.size:
+        return np.zeros(0)
+    a = a.astype(f"U{max(1, np.char.str_len(a).max())}")    # narrow the shared-table view
+    for ch in "$,":                                 # only pay for replace() where needed
+        if (np.char.find(a, ch) >= 0).any():
+            a = np.char.replace(a, ch, "")
+    a  = np.char.strip(a)
+    ok = np.char.isdigit(np.char.replace(a, ".", "", 1))
+    out = np.full(a.shape, np.nan)
+    out[ok] = a[ok].astype(np.float64)
+    return out
+
+
+# ─────────────────────────── derive + validate ───────────────────────────
+def build(cols: dict) -> dict:
+    blank = np.full(len(cols["address"]), "")
+    price, acres, year, sqft, beds, baths = (to_float(cols.get(k, blank)) for k in COLUMNS)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ppsf = np.where(sqft > 0, price / sqft, np.nan)
+        age  = date.today().year - year
+
+        lp  = np.log(ppsf)
+        fin = np.isfinite(lp)
+        z   = np.zeros_like(lp)
+        if fin.sum() >= 3:
+            med = np.median(lp[fin])
+            mad = np.median(np.abs(lp[fin] - med))
+            if mad > 0:
+                z = 0.6745 * (lp - med) / mad
+
+        def out_of(v, key):
+            lo, hi = RANGES[key]
+            return (v < lo) | (v > hi)              # NaN compares False → not flagged
+
+        bits = (np.isnan(price), out_of(price, "price"), out_of(sqft, "livingArea"),
+                out_of(year, "yearBuilt"), out_of(beds, "bedrooms"),
+                out_of(baths, "bathrooms"), out_of(acres, "lotAcres"),
+                np.abs(z) > OUTLIER_Z, acres > LOT_SUSPECT)
+    flags = np.zeros(len(price), dtype=np.uint16)
+    for i, b in enumerate(bits):
+        flags |= b.astype(np.uint16) << i
+
+    f32 = np.float32
+    return {"address":    cols["address"],
+            "price":      price,
+            "lotAcres":   acres.astype(f32),
+            "yearBuilt":  year.astype(f32),
+            "livingArea": sqft.astype(f32),
+            "bedrooms":   beds.astype(f32),
+            "bathrooms":  baths.astype(f32),
+            "pricePerSqft": ppsf.astype(f32),
+            "age":        age.astype(f32),
+            "flags":      flags}
+
+
+# ─────────────────────────── columnar files ───────────────────────────
+def save(arrays: dict, path):
+    tmp = path + ".tmp"
+    if path.endswith(".parquet"):
+        import pyarrow as pa, pyarrow.parquet as pq
+        table = pa.table(arrays).replace_schema_metadata({"flag_names": ",".join(FLAGS)})
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        with open(tmp, "wb") as f:                  # savez would append .npz to a path
+            np.savez_compressed(f, flag_names=np.array(FLAGS), **arrays)
+    os.replace(tmp, path)
+
+
+def load(path) -> dict:
+    """{column: ndarray} from a .npz or .parquet written by save()."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        t = pq.read_table(path)
+        return {c: t[c].to_numpy() for c in t.column_names}
+    with np.load(path) as z:
+        return {k: z[k] for k in z.files if k != "flag_names"}
+
+
+def write_features(csv_path, out_path) -> str:
+    """CSV → typed columns in out_path; returns the summary for the run report."""
+    t0 = time.perf_counter()
+    arrays = build(read_columns(csv_path))
+    t1 = time.perf_counter()
+    save(arrays, out_path)
+    t2 = time.perf_counter()
+    load(out_path)
+    t3 = time.perf_counter()
+
+    n, flags = len(arrays["flags"]), arrays["flags"]
+    hits = [f"{name} {int(((flags >> i) & 1).sum())}" for i, name in enumerate(FLAGS)
+            if ((flags >> i) & 1).any()]
+    ppsf = arrays["pricePerSqft"]
+    med  = np.nanmedian(ppsf) if np.isfinite(ppsf).any() else float("nan")
+    return (f"Features: {n} rows → {out_path} ({os.path.getsize(out_path) / 1024:.0f} KiB, "
+            f"written in {t2 - t0:.2f} s); loads in {(t3 - t2) * 1000:.0f} ms vs "
+            f"{(t1 - t0) * 1000:.0f} ms from the CSV; median ${med:.0f}/sqft\n"
+            f"  flagged: {', '.join(hits) or 'none'}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="results CSV → typed, validated .npz / .parquet")
+    ap.add_argument("csv")
+    ap.add_argument("out", help="*.npz, or *.parquet (needs pyarrow)")
+    a = ap.parse_args()
+    print(write_features(a.csv, a.out))
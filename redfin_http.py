@@ -0,0 +1,62 @@
+"""
+redfin_http.py   –   2025-08-07
+Browserless fetch of a known property URL.
+
+Most of what the parsers need is in the server-rendered HTML/JSON, so once
+an address has a cached /home/ URL we can GET it over a pooled keep-alive
+connection and parse it directly – no Chrome render. urllib3 is already
+installed as a selenium dependency; no selenium import here.
+"""
+
+import threading
+
+import urllib3
+
+UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+      "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36")
+
+
+class HTTPFetcher:
+    def __init__(self, workers=1, timeout=15):
+        self.pool = urllib3.PoolManager(
+            num_pools=4, maxsize=max(1, workers), block=True,
+            headers={"User-Agent": UA,
+                     "Accept": "text/html,application/xhtml+xml",
+                     "Accept-Language": "en-US,en;q=0.9",
+                     "Accept-Encoding": "gzip, deflate"},
+            timeout=urllib3.Timeout(connect=5, read=timeout),
+            retries=urllib3.Retry(total=2, backoff_factor=0.5,
+                                  status_forcelist=(500, 502, 503, 504)))
+        self.fetches = self.failures = self.bytes = 0
+        self.served = self.escalated = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str) -> str:
+        """Page HTML, or '' on a non-200 / network error (→ caller escalates)."""
+        try:
+            r = self.pool.request("GET", url, preload_content=True)
+        except urllib3.exceptions.HTTPError:
+            with self._lock:
+                self.fetches += 1; self.failures += 1
+            return ""
+        ok = r.status == 200
+        with self._lock:
+            self.fetches += 1; self.failures += not ok
+            self.bytes += len(r.data)
+        return r.data.decode("utf-8", "replace") if ok else ""
+
+    def outcome(self, served: bool):
+        """Record whether the HTTP page was enough or we fell back to Chrome."""
+        with self._lock:
+            if served:
+                self.served += 1
+            else:
+                self.escalated += 1
+
+    def report(self) -> str:
+        return (f"HTTP-first: {self.fetches} fetches ({self.failures} failed, "
+                f"{self.bytes / 1e6:.1f} MB), {self.served} served without Chrome, "
+                f"{self.escalated} escalated to Selenium")
+
+    def close(self):
+        self.pool.clear()
@@ -0,0 +1,53 @@
+"""
+redfin_input.py   –   2025-08-07
+Streaming address reader + deterministic sharding.
+
+    read_addresses("addresses.csv")                # lazy, header skipped
+    read_addresses("addresses.csv", shard=(0, 4))  # this machine's quarter
+
+A shard is picked by a stable hash (blake2b, not Python's salted hash())
+of the normalized *street* key, so every variant of one property – with
+or without city / ZIP – lands on the same machine and de-dup still
+works inside a shard. merge_shards.py puts the per-shard outputs back
+together in input order.
+"""
+
+import csv, hashlib
+
+from redfin_address import parse_address
+
+
+def parse_shard(spec):
+    """'2/8' → (2, 8); None / '' → None."""
+    if not spec:
+        return None
+    try:
+        i, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard expects i/N, got {spec!r}") from None
+    if not 0 <= i < n:
+        raise ValueError(f"--shard {spec}: need 0 <= i < N")
+    return i, n
+
+
+def shard_of(addr: str, n: int) -> int:
+    street = parse_address(addr)[0]
+    return int.from_bytes(hashlib.blake2b(street.encode("utf-8"), digest_size=8).digest(),
+                          "big") % n
+
+
+def read_addresses(path, shard=None):
+    """Yield first-column addresses one at a time – nothing is held in memory."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for n, row in enumerate(csv.reader(f)):
+            addr = row[0].strip() if row else ""
+            if not addr or (n == 0 and addr.lower() == "address"):
+                continue
+            if shard and shard_of(addr, shard[1]) != shard[0]:
+                continue
+            yield addr
+
+
+def shard_filter(addrs, shard):
+    """Same slice for an address list from elsewhere (e.g. the retry list)."""
+    return (a for a in addrs if not shard or shard_of(a, shard[1]) == shard[0])
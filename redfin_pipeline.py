@@ -0,0 +1,146 @@
+"""
+redfin_pipeline.py   –   2025-08-07
+asyncio pipeline: the browsers keep fetching while earlier pages are
+parsed and written.
+
+    reader ─▶ addr_q ─▶ fetch ×N (browser threads) ─▶ parse_q ─▶ parse ×P
+           (process pool) ─▶ write_q ─▶ writer (input order, one thread)
+
+Every queue is bounded, so a multi-million-row input never runs ahead of
+the browsers and memory stays flat. A monitor line prints queue depths
+and per-stage utilisation every `report_every` seconds.
+"""
+
+import asyncio, time, traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+_STOP = object()
+
+
+class _Stage:
+    def __init__(self, name, n):
+        self.name, self.n, self.busy, self.items = name, n, 0.0, 0
+
+    def util(self, elapsed):
+        return 100 * self.busy / (elapsed * self.n) if elapsed else 0.0
+
+
+async def _timed(stage, coro):
+    t0 = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        stage.busy += time.perf_counter() - t0
+        stage.items += 1
+
+
+async def _pipeline(addresses, fetch_fn, parse_fn, new_driver, on_result,
+                    workers, parse_workers, queue_size, report_every, process_parse):
+    loop = asyncio.get_running_loop()
+    addr_q, parse_q, write_q = (asyncio.Queue(queue_size) for _ in range(3))
+    st = {"fetch": _Stage("fetch", workers), "parse": _Stage("parse", parse_workers),
+          "write": _Stage("write", 1)}
+    browsers = ThreadPoolExecutor(workers, thread_name_prefix="browser")
+    cpu      = (ProcessPoolExecutor if process_parse else ThreadPoolExecutor)(parse_workers)
+    writer   = ThreadPoolExecutor(1, thread_name_prefix="writer")
+    t_start  = time.perf_counter()
+    done     = 0
+
+    async def reader():
+        idx = 0
+        for addr in addresses:
+            if addr is None:                        # nothing due yet (deferred retries)
+                await asyncio.sleep(0.5)
+                continue
+            await addr_q.put((idx, addr))           # blocks when browsers are behind
+            idx += 1
+        for _ in range(workers):
+            await addr_q.put(_STOP)
+
+    async def fetcher(wid):
+        driver = None
+        try:
+            driver = await loop.run_in_executor(browsers, new_driver)
+            while (item := await addr_q.get()) is not _STOP:
+                idx, addr = item
+                print(f"\n──── [w{wid}] Scraping:", addr)
+                try:
+                    payload = await _timed(st["fetch"], loop.run_in_executor(
+                        browsers, fetch_fn, driver, addr))
+                except Exception:
+                    traceback.print_exc()
+                    payload = None
+                await parse_q.put((idx, addr, payload))
+        finally:
+            if driver is not None:
+                await loop.run_in_executor(browsers, driver.quit)
+
+    async def parser():
+        while (item := await parse_q.get()) is not _STOP:
+            idx, addr, payload = item
+            data = {}
+            if payload is not None:
+                try:
+                    data = await _timed(st["parse"], loop.run_in_executor(cpu, parse_fn, payload))
+                except Exception:
+                    traceback.print_exc()
+            await write_q.put((idx, addr, data))
+
+    async def writer_task():
+        nonlocal done
+        pending, next_idx = {}, 0
+        while (item := await write_q.get()) is not _STOP:
+            pending[item[0]] = item[1:]
+            while next_idx in pending:              # re-order to input order
+                addr, data = pending.pop(next_idx)
+                await _timed(st["write"], loop.run_in_executor(writer, on_result, addr, data))
+                next_idx += 1; done += 1
+        for idx in sorted(pending):                 # gaps only if a fetch task died
+            await loop.run_in_executor(writer, on_result, *pending[idx]); done += 1
+
+    async def monitor():
+        while True:
+            await asyncio.sleep(report_every)
+            el = time.perf_counter() - t_start
+            print(f"[pipe] {done} written | queues addr {addr_q.qsize()}/{queue_size} "
+                  f"parse {parse_q.qsize()}/{queue_size} write {write_q.qsize()}/{queue_size} | "
+                  + " ".join(f"{s.name} {s.util(el):.0f}%" for s in st.values()))
+
+    mon   = asyncio.create_task(monitor())
+    tasks = [asyncio.create_task(reader())]
+    try:
+        fetchers = [asyncio.create_task(fetcher(w)) for w in range(workers)]
+        parsers  = [asyncio.create_task(parser()) for _ in range(parse_workers)]
+        wtask    = asyncio.create_task(writer_task())
+        tasks   += fetchers + parsers + [wtask]
+        await asyncio.gather(tasks[0], *fetchers)   # a browser that fails to start raises here
+        for _ in parsers:
+            await parse_q.put(_STOP)
+        await asyncio.gather(*parsers)
+        await write_q.put(_STOP)
+        await wtask
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        raise
+    finally:
+        mon.cancel()
+        browsers.shutdown(wait=False); cpu.shutdown(); writer.shutdown()
+
+    el = time.perf_counter() - t_start
+    print(f"Pipeline: {done} rows in {el:.0f} s – utilisation "
+          + ", ".join(f"{s.name} {s.util(el):.0f}% ({s.items})" for s in st.values()))
+    return done
+
+
+def run_pipeline(addresses, fetch_fn, parse_fn, new_driver, on_result,
+                 workers=1, parse_workers=2, queue_size=None, report_every=30.0,
+                 process_parse=True):
+    """
+    fetch_fn(driver, addr) → picklable payload   (browser thread)
+    parse_fn(payload)      → data dict           (process pool; top-level function)
+    on_result(addr, data)  – called in input order from a single writer thread
+    """
+    return asyncio.run(_pipeline(
+        addresses, fetch_fn, parse_fn, new_driver, on_result, max(1, workers),
+        max(1, parse_workers), queue_size or 2 * max(1, workers), report_every, process_parse))
@@ -0,0 +1,115 @@
+"""
+redfin_pool.py   –   2025-08-07
+Fan addresses out to N independent Chrome drivers and hand the results
+back strictly in input order, so the output CSV looks exactly like a
+single-browser run – just N× faster.
+"""
+
+import queue, random, threading, time
+import traceback
+
+_STOP = object()
+
+
+# ───────────────────────── worker thread ─────────────────────────
+def _worker(wid, new_driver, scrape_fn, tasks, results, pause_range):
+    """Own one browser; pull (idx, addr) until the sentinel shows up."""
+    driver = None
+    try:
+        driver = new_driver()
+        while True:
+            task = tasks.get()
+            if task is _STOP:
+                break
+            idx, addr = task
+            print(f"\n──── [w{wid}] Scraping:", addr)
+            try:
+                data = scrape_fn(driver, addr)
+            except Exception:                       # one bad page ≠ dead run
+                traceback.print_exc()
+                data = {}
+            results.put((idx, addr, data))
+            if pause_range:
+                time.sleep(random.uniform(*pause_range))
+    except Exception:                               # driver failed to start
+        traceback.print_exc()
+    finally:
+        results.put((None, wid, None))              # "worker finished" marker
+        if driver is not None:
+            driver.quit()
+
+
+# ───────────────────────── public entry ─────────────────────────
+def run_pool(addresses, scrape_fn, new_driver, on_result,
+             workers=1, pause_range=(4, 8)):
+    """
+    addresses   – iterable of address strings (input order); None = nothing to
+                  hand out yet (e.g. a retry not due) – results are drained meanwhile
+    scrape_fn   – scrape_fn(driver, addr) -> dict
+    new_driver  – zero-arg factory, called once inside every worker
+    on_result   – on_result(addr, data) called in *input* order, main thread
+
+    Returns the number of addresses handed to on_result.
+    """
+    workers = max(1, int(workers))
+    tasks   = queue.Queue(maxsize=workers * 2)     # small: keeps input lazy
+    results = queue.Queue()
+
+    threads = [threading.Thread(target=_worker, daemon=True,
+                                args=(w, new_driver, scrape_fn, tasks,
+                                      results, pause_range))
+               for w in range(workers)]
+    for t in threads:
+        t.start()
+
+    pending, next_idx, alive = {}, 0, workers
+
+    def drain(block):
+        nonlocal next_idx, alive
+        while True:
+            try:
+                idx, addr, data = results.get(block=block, timeout=0.5 if block else None)
+            except queue.Empty:
+                return
+            if idx is None:                         # a worker exited
+                alive -= 1
+            else:
+                pending[idx] = (addr, data)
+            while next_idx in pending:              # re-order buffer
+                on_result(*pending.pop(next_idx))
+                next_idx += 1
+            block = False
+
+    n = 0
+    for addr in addresses:
+        if addr is None:                            # "nothing due yet" – collect results meanwhile
+            if alive == 0:
+                raise RuntimeError("all browser workers died – see traceback above")
+            drain(block=True)
+            continue
+        while True:
+            if alive == 0:
+                raise RuntimeError("all browser workers died – see traceback above")
+            try:
+                tasks.put((n, addr), timeout=0.5)
+                break
+            except queue.Full:
+                drain(block=False)
+        n += 1
+        drain(block=False)
+
+    stops = len(threads)
+    while stops and alive > 0:
+        try:
+            tasks.put(_STOP, timeout=0.5); stops -= 1
+        except queue.Full:
+            drain(block=False)
+    while next_idx < n and alive > 0:
+        drain(block=True)
+    drain(block=False)
+    for t in threads:
+        t.join()
+
+    if next_idx < n:
+        raise RuntimeError(f"only {next_idx}/{n} addresses finished – workers died")
+    return n
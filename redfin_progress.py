@@ -0,0 +1,103 @@
+"""
+redfin_progress.py   –   2025-08-07
+Resume support for the appending runner (B2.py).
+
+    <out>.done        one normalized address per line – already in <out>
+    <out>.failed.csv  rows that errored / came back without a price
+
+Both files are append-only, so a crash can at worst lose the line being
+written. A restart loads .done into a set, adds any priced CSV row a crash
+left out of it, and skips those rows in O(1).
+"""
+
+import csv, os
+from datetime import datetime
+
+from redfin_address import normalize_address
+
+FAILED_HEADER = ["address", "reason", "when", "price", "lotSize", "yearBuilt",
+                 "livingArea", "bedrooms", "bathrooms"]
+
+
+class ProgressIndex:
+    def __init__(self, out_csv: str):
+        self.done_path   = out_csv + ".done"
+        self.failed_path = out_csv + ".failed.csv"
+        self.done        = set()
+
+        if os.path.exists(self.done_path):
+            with open(self.done_path, encoding="utf-8") as f:
+                # re-normalized: keys written before the address parser (user-015) still match
+                self.done.update(normalize_address(line.rstrip("\n")) for line in f if line.strip())
+        indexed = set(self.done)
+        if os.path.exists(out_csv):
+            self._seed_from_output(out_csv)
+
+        self._done_f = open(self.done_path, "a", encoding="utf-8")
+        if self.done != indexed:
+            self._done_f.writelines(k + "\n" for k in sorted(self.done - indexed))
+            self._sync(self._done_f)
+
+    # ── rows on disk but not in .done (first run after upgrading, or a
+    #    crash between the CSV fsync and the .done fsync): trust priced rows ──
+    def _seed_from_output(self, out_csv):
+        with open(out_csv, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if (row.get("address") or "").strip() and (row.get("price") or "").strip():
+                    self.done.add(normalize_address(row["address"]))
+
+    @staticmethod
+    def _sync(f):
+        f.flush(); os.fsync(f.fileno())
+
+    # ─────────────────────────── queries ───────────────────────────
+    def is_done(self, addr: str) -> bool:
+        return normalize_address(addr) in self.done
+
+    def failed(self) -> list:
+        """Addresses in .failed.csv that have not succeeded since (file order)."""
+        if not os.path.exists(self.failed_path):
+            return []
+        seen, out = set(), []
+        with open(self.failed_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = normalize_address(row["address"])
+                if key not in self.done and key not in seen:
+                    seen.add(key); out.append(row["address"])
+        return out
+
+    # ─────────────────────────── updates ───────────────────────────
+    def mark_done(self, addr: str):
+        """Call *after* the output row is on disk."""
+        self.mark_done_many((addr,))
+
+    def mark_done_many(self, addrs, sync=True):
+        """
+        Batch form – one fsync for a whole group commit. sync=False only
+        flushes: fine when the rows are already fsynced in <out>, since a
+        restart re-indexes them from there.
+        """
+        new = []
+        for addr in addrs:
+            key = normalize_address(addr)
+            if key not in self.done:
+                self.done.add(key); new.append(key + "\n")
+        if new:
+            self._done_f.writelines(new)
+            if sync:
+                self._sync(self._done_f)
+            else:
+                self._done_f.flush()
+
+    def mark_failed(self, addr: str, reason: str, data: dict):
+        new = not os.path.exists(self.failed_path)
+        with open(self.failed_path, "a", newline="", encoding="utf-8") as f:
+            wtr = csv.writer(f)
+            if new:
+                wtr.writerow(FAILED_HEADER)
+            wtr.writerow([addr, reason, datetime.now().isoformat(timespec="seconds")]
+                         + [data.get(k, "") for k in FAILED_HEADER[3:]])
+            self._sync(f)
+
+    def close(self):
+        self._done_f.close()
@@ -0,0 +1,125 @@
+"""
+redfin_ratelimit.py   –   2025-08-07
+Adaptive pacing shared by every browser worker (replaces the blind
+random.uniform(4, 8) sleep after each address).
+
+Token bucket with burst 1: each acquire() books the next free slot
+60/rpm seconds (± jitter) after the previous one, across all workers.
+The rate moves AIMD-style on feedback:
+    healthy page            → +step rpm            (up to max_rpm)
+    slow page (> slow_secs) → ×0.8
+    empty-price streak      → ×0.7
+    captcha / block page    → ×0.5 and a cool-down pause
+Every change is logged, plus the effective requests/min every `log_every`.
+"""
+
+import random, re, threading, time
+from collections import deque
+
+_BLOCK = re.compile(r"captcha|access to this page has been denied|unusual traffic|"
+                    r"request blocked|are you a robot|px-block", re.I)
+
+
+def looks_blocked(text: str) -> bool:
+    """Title / first screen of text → True for captcha & block pages."""
+    return bool(text) and bool(_BLOCK.search(text))
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rpm=10.0, min_rpm=2.0, max_rpm=60.0, step=0.5, jitter=0.25,
+                 slow_secs=25.0, empty_streak=3, cooldown=60.0, log_every=20, log=print):
+        self.min_rpm, self.max_rpm = float(min_rpm), float(max_rpm)
+        self.rpm = min(max(float(rpm), self.min_rpm), self.max_rpm)   # e.g. --workers 8 > --max-rpm
+        self.step, self.jitter, self.slow_secs = step, jitter, slow_secs
+        self.empty_streak, self.cooldown = empty_streak, cooldown
+        self.log_every, self.log = log_every, log
+        self._lock     = threading.Lock()
+        self._next     = 0.0                        # monotonic time of the next free slot
+        self._pause    = 0.0                        # cool-down until
+        self._empties  = 0
+        self._recent   = deque()                    # acquire times, last 60 s
+        self.requests = self.blocks = self.slow = 0
+        self.slept = 0.0
+
+    # ─────────────────────────── pacing ───────────────────────────
+    def acquire(self):
+        with self._lock:
+            now  = time.monotonic()
+            slot = max(now, self._next, self._pause)
+            gap  = 60.0 / self.rpm
+            self._next = slot + gap * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self.requests += 1
+            self._recent.append(slot)
+            while self._recent and self._recent[0] < slot - 60:
+                self._recent.popleft()
+            report = self.log_every and self.requests % self.log_every == 0
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+            with self._lock:
+                self.slept += delay
+        if report:
+            self.log(f"[rate] target {self.rpm:.1f} rpm, effective {self.effective_rpm():.1f} rpm "
+                     f"after {self.requests} requests")
+
+    def effective_rpm(self) -> float:
+        with self._lock:
+            if len(self._recent) < 2:
+                return float(len(self._recent))
+            span = max(self._recent[-1] - self._recent[0], 1e-6)
+            return 60.0 * (len(self._recent) - 1) / span
+
+    # ─────────────────────────── feedback ──────────────────────────
+    def _set(self, rpm, why):
+        old, self.rpm = self.rpm, min(self.max_rpm, max(self.min_rpm, rpm))
+        if why == "healthy" and int(self.rpm) == int(old):
+            return                                  # don't log every +step
+        if abs(self.rpm - old) >= 0.05:
+            self.log(f"[rate] {old:.1f} → {self.rpm:.1f} rpm ({why})")
+
+    def feedback(self, latency: float, blocked=False, empty=False):
+        with self._lock:
+            if blocked:
+                self.blocks += 1
+                self._pause = time.monotonic() + self.cooldown
+                self._set(self.rpm * 0.5, f"block page – pausing {self.cooldown:.0f} s")
+                return
+            self._empties = self._empties + 1 if empty else 0
+            if self._empties >= self.empty_streak:
+                self._empties = 0
+                self._set(self.rpm * 0.7, f"{self.empty_streak} empty prices in a row")
+            elif latency > self.slow_secs:
+                self.slow += 1
+                self._set(self.rpm * 0.8, f"slow page {latency:.1f} s")
+            elif not empty:
+                self._set(self.rpm + self.step, "healthy")
+
+    # ─────────────────────────── plumbing ──────────────────────────
+    def wrap(self, scrape_fn, probe=None):
+        """
+        scrape_fn(driver, addr) paced by this limiter. `probe(driver)` → short
+        page text used for block detection (skipped when None).
+        """
+        def run(driver, addr):
+            self.acquire()
+            t0 = time.monotonic()
+            try:
+                data = scrape_fn(driver, addr)
+            except Exception:
+                self.feedback(time.monotonic() - t0, empty=True)
+                raise
+            blocked = False
+            if probe is not None:
+                try:
+                    blocked = looks_blocked(probe(driver))
+                except Exception:
+                    pass
+            self.feedback(time.monotonic() - t0, blocked=blocked,
+                          empty=not (data or {}).get("price"))
+            return data
+        return run
+
+    def report(self) -> str:
+        return (f"Rate limiter: {self.requests} requests, final {self.rpm:.1f} rpm, "
+                f"effective {self.effective_rpm():.1f} rpm, {self.blocks} block pages, "
+                f"{self.slow} slow pages, {self.slept:.0f} s paced")
@@ -0,0 +1,172 @@
+"""
+redfin_retry.py   –   2025-08-07
+Classified failures and a deferred retry queue that runs alongside the
+main pass instead of a manual --retry-failed re-run afterwards.
+
+    retry     = RetryQueue()
+    scrape_fn = retry.wrap(scrape_fn, probe=page_head_text)   # failure → class
+    run_pool(retry.feed(addrs), scrape_fn, new_driver, retry.on_result(save))
+
+Every failed address gets one class:
+    timeout     a TimeoutException (search box, page never usable …)
+    blocked     captcha / block page (redfin_ratelimit.looks_blocked)
+    no_result   no price and not on a property page – search found nothing
+    parse_miss  on a property page, but no price could be read
+    error       anything else that raised
+and goes to a heap with the class's backoff (POLICIES). feed() slips due
+retries in between main addresses – at most one per main address, so the
+steady stream keeps its pace – and at the end waits for the stragglers,
+but only `tail_cap` seconds: a retry due later than that is given up and
+saved as it failed (→ .failed.csv) instead of holding the run open for a
+15-minute no_result backoff. on_result() holds a failure back while it
+still has attempts left, so only the final outcome is saved. Needs a
+runner that accepts None from `addresses` as "nothing due yet"
+(run_pool / run_pipeline do). A browser that died mid-page is the
+queue's to retry too – give DriverSupervisor retries=0 alongside it.
+"""
+
+import heapq, threading, time, traceback
+from collections import Counter
+
+from selenium.common.exceptions import TimeoutException
+
+from redfin_ratelimit import looks_blocked
+
+# class → (retries, first delay s, backoff factor)
+POLICIES = {
+    "timeout":    (2, 30, 2),       # usually a slow moment – soon, then later
+    "blocked":    (2, 300, 3),      # let the rate limiter cool down first
+    "no_result":  (1, 900, 1),      # search index hiccup – one late look
+    "parse_miss": (1, 60, 1),       # page half rendered – one more try
+    "error":      (1, 60, 1),
+}
+
+
+class RetryQueue:
+    def __init__(self, policies=POLICIES, tail_cap=120):
+        self.policies = policies
+        self.tail_cap = tail_cap                    # s the run waits for retries after the main pass
+        self._lock    = threading.Lock()
+        self._save_lock = threading.Lock()          # tail give-ups vs the runner's writer thread
+        self._save    = None
+        self._last    = {}                          # addr → data of its deferred failure
+        self._heap    = []                          # (due, seq, addr, class)
+        self._seq     = 0
+        self._tries   = {}                          # addr → retries so far (failing addrs only)
+        self._classes = {}                          # addr → class of its last failure
+        self.in_flight = 0
+        self.failed    = Counter()                  # class → failures seen
+        self.recovered = Counter()                  # class → later succeeded
+        self.gave_up   = Counter()                  # class → still failing at the end
+        self.retries   = 0
+
+    # ─────────────────────────── classify ───────────────────────────
+    def wrap(self, scrape_fn, probe=None):
+        """scrape_fn(driver, addr) → data, with data['failure'] set when it failed."""
+        def run(driver, addr):
+            try:
+                data = scrape_fn(driver, addr)
+            except TimeoutException:
+                return {"failure": "timeout"}
+            except Exception:
+                traceback.print_exc()
+                return {"failure": "error"}
+            if (data or {}).get("price"):
+                return data
+            data = dict(data or {})
+            try:
+                text = probe(driver) if probe else ""
+                url  = driver.current_url
+            except Exception:
+                text, url = "", ""
+            data["failure"] = ("blocked" if looks_blocked(text) else
+                               "parse_miss" if "/home/" in url else "no_result")
+            return data
+        return run
+
+    # ─────────────────────────── schedule ───────────────────────────
+    def _due(self):
+        with self._lock:
+            if self._heap and self._heap[0][0] <= time.monotonic():
+                self.retries += 1; self.in_flight += 1
+                return heapq.heappop(self._heap)[2]
+        return None
+
+    def feed(self, addrs):
+        """Main addresses with due retries interleaved; None while only waiting."""
+        for addr in addrs:
+            with self._lock:
+                self.in_flight += 1
+            yield addr
+            retry = self._due()
+            if retry is not None:
+                yield retry
+        end = time.monotonic() + self.tail_cap
+        while True:                                 # main pass done – drain the tail
+            with self._lock:
+                late = [e for e in self._heap if e[0] > end]
+                if late:
+                    self._heap = [e for e in self._heap if e[0] <= end]
+                    heapq.heapify(self._heap)
+                if not self._heap and not self.in_flight and not late:
+                    return
+            for _, _, addr, cls in late:
+                self._give_up(addr, cls, "retry due past the tail cap")
+            if late:
+                continue
+            retry = self._due()
+            yield retry                             # None → runner waits for results
+
+    def on_result(self, save):
+        """save(addr, data) wrapper: defer a failure while its class allows another try."""
+        self._save = save
+
+        def run(addr, data):
+            cls = data.get("failure") if data else "error"
+            with self._lock:
+                self.in_flight -= 1
+                tries = self._tries.get(addr, 0)
+                if not cls:
+                    if tries:
+                        self.recovered[self._classes.get(addr, "error")] += 1
+                        self._forget(addr)
+                else:
+                    self.failed[cls] += 1
+                    retries, delay, factor = self.policies.get(cls, POLICIES["error"])
+                    if tries < retries:
+                        self._tries[addr] = tries + 1
+                        self._classes[addr] = cls
+                        self._last[addr] = data
+                        due = time.monotonic() + delay * factor ** tries
+                        heapq.heappush(self._heap, (due, self._seq, addr, cls)); self._seq += 1
+                        print(f"   ⏳ {addr}: {cls}, retry {tries + 1}/{retries} in "
+                              f"{delay * factor ** tries:.0f} s")
+                        return
+                    self.gave_up[cls] += 1
+                    self._forget(addr)
+            with self._save_lock:
+                save(addr, data if data else {"failure": "error"})
+        return run
+
+    def _forget(self, addr):
+        self._tries.pop(addr, None); self._classes.pop(addr, None)
+        return self._last.pop(addr, None)
+
+    def _give_up(self, addr, cls, why):
+        with self._lock:
+            self.gave_up[cls] += 1
+            data = self._forget(addr) or {"failure": cls}
+        print(f"   ⌛ {addr}: {cls}, given up – {why}")
+        with self._save_lock:
+            self._save(addr, data)
+
+    # ─────────────────────────── report ───────────────────────────
+    def report(self) -> str:
+        lines = [f"Failures: {sum(self.failed.values())} over {self.retries} deferred retries – "
+                 f"{sum(self.recovered.values())} recovered, {sum(self.gave_up.values())} "
+                 f"given up (→ .failed.csv)"]
+        for cls in self.policies:
+            if self.failed[cls]:
+                lines.append(f"  {cls:10} {self.failed[cls]:5d} failures, "
+                             f"{self.recovered[cls]} recovered, {self.gave_up[cls]} given up")
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+"""
+redfin_session.py   –   2025-08-07
+Warm Chrome sessions instead of a cold browser + homepage + cookie check
+for every address.
+
+    --profile DIR    persistent user-data-dir per browser slot (DIR/w0, DIR/w1 …)
+                     – cookies, incl. the consent cookie, survive restarts
+    --warm-session   search from the header box of the page already open
+                     instead of reloading the homepage; stop looking for the
+                     cookie banner once it has been handled
+    --block-heavy    no images / fonts / media / map tiles (Chrome prefs +
+                     DevTools Network.setBlockedURLs)
+    --headless       Chrome's new headless mode
+
+With --trace, SESSION.measure() samples load time and bytes transferred of
+every parsed page (Navigation + Resource Timing), so runs with and without
+--block-heavy can be compared from the summary line.
+"""
+
+import os, statistics, threading
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+BLOCK_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+}
+BLOCKED_URLS = [f"*.{ext}*" for ext in
+                ("jpg", "jpeg", "png", "gif", "webp", "avif", "svg", "ico",
+                 "woff", "woff2", "ttf", "otf", "mp4", "webm", "m3u8")] + \
+               ["*maps.googleapis.com*", "*maps.gstatic.com*", "*/tiles/*", "*mapbox*"]
+
+MEASURE_JS = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const res = performance.getEntriesByType('resource');
+let bytes = nav.transferSize || 0;
+for (const r of res) bytes += r.transferSize || r.encodedBodySize || 0;
+return [Math.round((nav.loadEventEnd || nav.domContentLoadedEventEnd || 0) - (nav.startTime || 0)),
+        bytes, res.length];
+"""
+_BANNER_OK = ".redfin_consent"                      # marker file inside a profile dir
+
+
+class Session:
+    def __init__(self):
+        self.profile = None
+        self.warm = self.block = self.headless = self.measuring = False
+        self._lock  = threading.Lock()
+        self._slots = set()                         # profile slots in use
+        self.loads, self.bytes, self.resources = [], 0, 0
+        self.banners_skipped = self.homepages_skipped = 0
+
+    # ─────────────────────────── start-up ───────────────────────────
+    def _take_slot(self):
+        with self._lock:
+            slot = next(i for i in range(len(self._slots) + 1) if i not in self._slots)
+            self._slots.add(slot)
+        return slot
+
+    def start(self, opts):
+        """webdriver.Chrome(options=opts) with the session switches applied."""
+        if self.headless:
+            opts.add_argument("--headless=new"); opts.add_argument("--window-size=1920,1080")
+        if self.block:
+            opts.add_experimental_option("prefs", BLOCK_PREFS)
+        slot = path = None
+        if self.profile:                            # one dir per live browser – Chrome locks it
+            slot = self._take_slot()
+            path = os.path.abspath(os.path.join(self.profile, f"w{slot}"))
+            os.makedirs(path, exist_ok=True)
+            opts.add_argument(f"--user-data-dir={path}")
+        try:
+            driver = webdriver.Chrome(options=opts)
+        except Exception:
+            self._release(slot)
+            raise
+        driver._rf_profile = path
+        driver._rf_banner  = bool(path and os.path.exists(os.path.join(path, _BANNER_OK)))
+        driver._rf_misses  = 0
+        if self.block:
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+            except WebDriverException:
+                pass                                # prefs still keep images out
+        if slot is not None:                        # hand the profile back on quit()
+            quit = driver.quit
+
+            def quit_and_release():
+                try:
+                    quit()
+                finally:
+                    self._release(slot)
+            driver.quit = quit_and_release
+        return driver
+
+    def _release(self, slot):
+        if slot is not None:
+            with self._lock:
+                self._slots.discard(slot)
+
+    # ─────────────────────────── warm paths ───────────────────────────
+    def banner_done(self, driver) -> bool:
+        """--warm-session: banner already handled in this browser / profile → skip the wait."""
+        if self.warm and getattr(driver, "_rf_banner", False):
+            with self._lock:
+                self.banners_skipped += 1
+            return True
+        return False
+
+    def banner_seen(self, driver, clicked: bool):
+        """Record a banner check. A click – or two checks in a row with no banner – settles it."""
+        driver._rf_misses = 0 if clicked else getattr(driver, "_rf_misses", 0) + 1
+        if clicked or driver._rf_misses >= 2:
+            driver._rf_banner = True
+            path = getattr(driver, "_rf_profile", None)
+            if clicked and path:
+                open(os.path.join(path, _BANNER_OK), "w").close()
+
+    def search_box(self, driver, base_url):
+        """--warm-session: the header search box of the current page, or None → load the homepage."""
+        if not self.warm:
+            return None
+        try:
+            if not driver.current_url.startswith(base_url):
+                return None
+            boxes = driver.find_elements(By.ID, "search-box-input")
+        except WebDriverException:
+            return None
+        if boxes:
+            with self._lock:
+                self.homepages_skipped += 1
+            return boxes[0]
+        return None
+
+    # ─────────────────────────── measuring ───────────────────────────
+    def measure(self, driver):
+        if not self.measuring:
+            return
+        try:
+            load_ms, nbytes, nres = driver.execute_script(MEASURE_JS)
+        except WebDriverException:
+            return
+        with self._lock:
+            self.loads.append(load_ms); self.bytes += nbytes; self.resources += nres
+
+    def report(self) -> str:
+        parts = [f"Session: {'headless' if self.headless else 'headed'}, "
+                 f"blocking {'on' if self.block else 'off'}, "
+                 f"profile {self.profile or 'temporary'}"]
+        if self.warm:
+            parts.append(f"{self.homepages_skipped} homepage loads and "
+                         f"{self.banners_skipped} banner checks skipped")
+        if self.loads:
+            n = len(self.loads)
+            parts.append(f"{n} pages: median load {statistics.median(self.loads):.0f} ms, "
+                         f"{self.bytes / n / 1024:.0f} KiB and {self.resources / n:.1f} "
+                         f"requests per page")
+        return " – ".join(parts)
+
+
+SESSION = Session()
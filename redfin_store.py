@@ -0,0 +1,165 @@
+"""
+redfin_store.py   –   2025-08-07
+SQLite results store keyed by normalized address, so the monthly re-run
+only scrapes what is stale instead of truncating / appending the CSV.
+
+    homes(key PK, address, price, lotSize, yearBuilt, livingArea,
+          bedrooms, bathrooms, tier, fetched_at, attempted_at, complete)
+
+upsert() merges a result into the row (a blank field never overwrites a
+known one; the first-seen address spelling is kept); is_fresh() says
+whether an address can be skipped – complete and fetched within the
+TTL. export_csv() regenerates the CSV from the store in first-seen order.
+
+    python redfin_store.py import house_details_redfin.csv   # seed from an old CSV
+    python redfin_store.py export out.csv
+"""
+
+import argparse, csv, os, sqlite3, threading
+from datetime import datetime, timedelta
+
+from redfin_address import normalize_address
+
+FIELDS   = ("price", "lotSize", "yearBuilt", "livingArea", "bedrooms", "bathrooms")
+REQUIRED = ("price", "livingArea", "yearBuilt")      # else "incomplete" → re-scraped
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS homes (
+    key          TEXT PRIMARY KEY,
+    address      TEXT NOT NULL,
+    price        TEXT, lotSize TEXT, yearBuilt TEXT, livingArea TEXT,
+    bedrooms     TEXT, bathrooms TEXT,
+    tier         TEXT,
+    fetched_at   TEXT,                 -- last scrape that produced a price
+    attempted_at TEXT,                 -- last scrape of any outcome
+    complete     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS homes_fresh ON homes (complete, fetched_at);
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ResultStore:
+    def __init__(self, path="redfin_results.sqlite", ttl_days=30):
+        self.path, self.ttl_days = path, ttl_days
+        self._db   = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._migrate_keys()
+        self.cutoff = (datetime.now() - timedelta(days=ttl_days)).isoformat(timespec="seconds")
+        self.fresh = self.upserts = 0
+
+    def _migrate_keys(self):
+        """Once per file: re-key rows from before the address parser (schema version 1)."""
+        if self._db.execute("PRAGMA user_version").fetchone()[0] >= 1:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            for key, addr in self._db.execute("SELECT key, address FROM homes").fetchall():
+                new = normalize_address(addr)
+                if new != key:                      # a row already under the new key wins
+                    self._db.execute("UPDATE OR IGNORE homes SET key=? WHERE key=?", (new, key))
+            self._db.execute("PRAGMA user_version=1")
+            self._db.execute("COMMIT")
+
+    # ─────────────────────────── queries ───────────────────────────
+    def is_fresh(self, addr: str) -> bool:
+        """Complete row fetched within ttl_days → no need to scrape again."""
+        with self._lock:
+            hit = self._db.execute(
+                "SELECT 1 FROM homes WHERE key=? AND complete=1 AND fetched_at>=?",
+                (normalize_address(addr), self.cutoff)).fetchone()
+        self.fresh += hit is not None
+        return hit is not None
+
+    def counts(self) -> dict:
+        with self._lock:
+            total, complete, fresh = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(complete), 0), "
+                "COALESCE(SUM(complete=1 AND fetched_at>=?), 0) FROM homes",
+                (self.cutoff,)).fetchone()
+        return {"rows": total, "complete": complete, "fresh": fresh}
+
+    # ─────────────────────────── updates ───────────────────────────
+    def upsert(self, addr: str, data: dict, tier: str = "", when: str = None):
+        key, now = normalize_address(addr), when or _now()
+        new = {k: "" if data.get(k) is None else str(data.get(k)) for k in FIELDS}
+        with self._lock:
+            old = self._db.execute(
+                "SELECT price, lotSize, yearBuilt, livingArea, bedrooms, bathrooms, "
+                "tier, fetched_at FROM homes WHERE key=?", (key,)).fetchone()
+            if old:
+                merged = {k: new[k] or (old[i] or "") for i, k in enumerate(FIELDS)}
+                tier, fetched = (tier, now) if new["price"] else (old[6], old[7])
+            else:
+                merged, fetched = new, now if new["price"] else None
+            complete = int(all(merged[k] for k in REQUIRED))
+            self._db.execute(
+                "INSERT INTO homes (key, address, price, lotSize, yearBuilt, livingArea, "
+                "bedrooms, bathrooms, tier, fetched_at, attempted_at, complete) "
+                "VALUES (?,?,?,?,?,?,?,?,?,?,?,?) "
+                "ON CONFLICT(key) DO UPDATE SET price=excluded.price, "
+                "lotSize=excluded.lotSize, yearBuilt=excluded.yearBuilt, "
+                "livingArea=excluded.livingArea, bedrooms=excluded.bedrooms, "
+                "bathrooms=excluded.bathrooms, tier=excluded.tier, fetched_at=excluded.fetched_at, "
+                "attempted_at=excluded.attempted_at, complete=excluded.complete",
+                (key, addr, *(merged[k] for k in FIELDS), tier or None, fetched, now, complete))
+            self.upserts += 1
+
+    # ─────────────────────────── CSV ───────────────────────────
+    def export_csv(self, out_csv, header=("address",) + FIELDS) -> int:
+        """Rewrite out_csv from the store (first-seen order, atomic replace)."""
+        tmp, n = out_csv + ".tmp", 0
+        with self._lock, open(tmp, "w", newline="", encoding="utf-8") as f:
+            wtr = csv.writer(f)
+            wtr.writerow(header)
+            for row in self._db.execute(
+                    "SELECT address, price, lotSize, yearBuilt, livingArea, bedrooms, "
+                    "bathrooms FROM homes WHERE price<>'' ORDER BY rowid"):
+                wtr.writerow(row); n += 1
+        os.replace(tmp, out_csv)
+        return n
+
+    def import_csv(self, in_csv) -> int:
+        """Seed from an existing output CSV (either script's header), dated by its mtime."""
+        n, when = 0, datetime.fromtimestamp(os.path.getmtime(in_csv)).isoformat(timespec="seconds")
+        self._db.execute("BEGIN")                   # one transaction, not one commit per row
+        try:
+            with open(in_csv, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    row = {k.split("(")[0]: v for k, v in row.items() if k}
+                    if (row.get("address") or "").strip():
+                        self.upsert(row["address"].strip(), row, "csv_import", when); n += 1
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+        return n
+
+    def report(self) -> str:
+        c = self.counts()
+        return (f"Results store: {c['rows']} homes ({c['complete']} complete, {c['fresh']} "
+                f"fresher than {self.ttl_days:g} d), {self.fresh} skipped as fresh, "
+                f"{self.upserts} upserts → {self.path}")
+
+    def close(self):
+        self._db.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="redfin results store: import / export CSV")
+    ap.add_argument("cmd", choices=("import", "export"))
+    ap.add_argument("csv")
+    ap.add_argument("--db", default="redfin_results.sqlite")
+    a = ap.parse_args()
+    st = ResultStore(a.db)
+    if a.cmd == "import":
+        print(f"imported {st.import_csv(a.csv)} rows into {a.db}")
+    else:
+        print(f"exported {st.export_csv(a.csv)} rows to {a.csv}")
+    st.close()
@@ -0,0 +1,216 @@
+"""
+redfin_supervisor.py   –   2025-08-07
+Keep long runs on healthy browsers.
+
+One Chrome bloats over a few hundred listing pages (RSS in GB, slower
+loads) and a chromedriver crash used to leave its worker scraping with
+a dead session. DriverSupervisor sits between the runner and new_driver():
+
+    sup       = DriverSupervisor(new_driver, max_pages=250, max_rss_mb=2048)
+    scrape_fn = sup.wrap(scrape_fn)
+    run_pool(addrs, scrape_fn, sup.new_driver, …)     # or run_pipeline
+
+Every worker gets a handle instead of a bare driver. After each page the
+handle books the page latency and, every `rss_every` pages, the RSS of
+chromedriver + all its Chrome processes; the browser is restarted after
+`max_pages`, above `max_rss_mb`, or when the session is gone (invalid
+session / window, chromedriver unreachable, or any other WebDriver error
+after which the browser no longer answers) – then the address in flight
+is retried on the fresh browser (same worker, so input order is kept).
+A NoSuchElement / StaleElement / Timeout from a browser that still
+answers is the page's problem and is raised unchanged.
+RSS comes from psutil when installed, else /proc (Linux); elsewhere only
+the page and error triggers work.
+"""
+
+import os, threading, time
+from collections import Counter, deque
+
+import urllib3
+from selenium.common.exceptions import (InvalidSessionIdException, NoSuchWindowException,
+                                        WebDriverException)
+
+try:
+    import psutil
+except ImportError:                                 # /proc fallback below
+    psutil = None
+
+_GONE = (InvalidSessionIdException, NoSuchWindowException,    # session / window is gone
+         urllib3.exceptions.HTTPError, ConnectionError)     # chromedriver unreachable
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def tree_rss_mb(pid):
+    """RSS of `pid` and all its descendants in MB, or None if it can't be read."""
+    if psutil:
+        try:
+            p = psutil.Process(pid)
+            return sum(q.memory_info().rss for q in [p] + p.children(recursive=True)) / 2**20
+        except psutil.Error:
+            return None
+    try:
+        kids = {}
+        for d in os.listdir("/proc"):
+            if d.isdigit():
+                try:
+                    with open(f"/proc/{d}/stat") as f:      # "pid (comm) state ppid …"
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+                kids.setdefault(ppid, []).append(int(d))
+        total, todo = 0, [pid]
+        while todo:
+            p = todo.pop()
+            todo += kids.get(p, [])
+            try:
+                with open(f"/proc/{p}/statm") as f:
+                    total += int(f.read().split()[1]) * _PAGE
+            except OSError:
+                pass
+        return total / 2**20 if total else None
+    except OSError:
+        return None
+
+
+def _driver_pid(driver):
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class _Handle:
+    """What a worker holds instead of a driver: restarts it under the hood."""
+
+    def __init__(self, sup, wid):
+        self.sup, self.wid = sup, wid
+        self.driver = None
+        self.pages  = 0                             # pages on the current browser
+        self.first  = []                            # latencies of its first pages
+        self.recent = deque(maxlen=10)              # … and of the latest ones
+
+    def get(self):
+        if self.driver is None:
+            self.driver = self.sup._start()
+            self.pages = 0; self.first = []; self.recent.clear()
+        return self.driver
+
+    def __getattr__(self, name):                    # stands in for the driver (probes etc.)
+        if self.driver is None:                     # just recycled – don't start one for a peek
+            raise AttributeError(name)
+        return getattr(self.driver, name)
+
+    def recycle(self, reason, detail=""):
+        self.sup._retire(self, reason, detail)
+        self.quit()
+
+    def quit(self):
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:                       # already dead – that's why we're here
+                pass
+
+
+class DriverSupervisor:
+    def __init__(self, new_driver, max_pages=250, max_rss_mb=2048, rss_every=10, retries=1):
+        self._new        = new_driver
+        self.max_pages   = max_pages                # 0 → no page limit
+        self.max_rss_mb  = max_rss_mb               # 0 → no memory limit
+        self.rss_every   = max(1, rss_every)
+        self.retries     = retries
+        self._lock       = threading.Lock()
+        self._wids       = 0
+        self.started     = self.retried = 0
+        self.recycled    = Counter()                # reason → restarts
+        self.rss         = []                       # (minutes into the run, worker, MB)
+        self.latency     = []                       # (first pages s, last pages s) per retired browser
+        self._t0         = time.monotonic()
+
+    # ─────────────────────────── driver lifecycle ───────────────────────────
+    def new_driver(self):
+        """Drop-in for the runners' new_driver(): a handle with a live browser."""
+        with self._lock:
+            wid = self._wids; self._wids += 1
+        h = _Handle(self, wid)
+        h.get()                                     # start-up failures surface here, as before
+        return h
+
+    def _start(self):
+        driver = self._new()
+        with self._lock:
+            self.started += 1
+        return driver
+
+    def _retire(self, h, reason, detail=""):
+        with self._lock:
+            self.recycled[reason] += 1
+            if h.first and h.recent:
+                self.latency.append((sum(h.first) / len(h.first),
+                                     sum(h.recent) / len(h.recent)))
+        print(f"   ↻ [w{h.wid}] browser restarted after {h.pages} pages ({detail or reason})")
+
+    @staticmethod
+    def _alive(driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    # ─────────────────────────── scrape wrapper ───────────────────────────
+    def wrap(self, scrape_fn):
+        """scrape_fn(driver, addr) → same on a handle, with restarts and one retry."""
+        def run(h, addr):
+            for attempt in range(self.retries + 1):
+                driver = h.get()
+                t0 = time.monotonic()
+                try:
+                    data = scrape_fn(driver, addr)
+                except (WebDriverException, *_GONE) as e:
+                    if not isinstance(e, _GONE) and self._alive(driver):
+                        raise                       # page trouble, healthy browser
+                    h.recycle(type(e).__name__)
+                    if attempt == self.retries:
+                        raise
+                    with self._lock:
+                        self.retried += 1
+                    print(f"   ↻ [w{h.wid}] retrying {addr} on a fresh browser")
+                    continue
+                self._after_page(h, driver, time.monotonic() - t0)
+                return data
+        return run
+
+    def _after_page(self, h, driver, secs):
+        h.pages += 1
+        (h.first if len(h.first) < 10 else h.recent).append(secs)
+        if self.max_pages and h.pages >= self.max_pages:
+            return h.recycle("pages")
+        if h.pages % self.rss_every == 0:
+            pid = _driver_pid(driver)
+            mb  = tree_rss_mb(pid) if pid else None
+            if mb is None:
+                return
+            with self._lock:
+                self.rss.append(((time.monotonic() - self._t0) / 60, h.wid, mb))
+            if self.max_rss_mb and mb > self.max_rss_mb:
+                h.recycle("rss", f"rss {mb:.0f} MB")
+
+    # ─────────────────────────── report ───────────────────────────
+    def report(self) -> str:
+        restarts = sum(self.recycled.values())
+        lines = [f"Driver supervisor: {self.started} browsers started, {restarts} restarts"
+                 + (" (" + ", ".join(f"{k} {n}" for k, n in self.recycled.most_common()) + ")"
+                    if restarts else "")
+                 + f", {self.retried} addresses retried"]
+        if self.latency:
+            a = sum(x for x, _ in self.latency) / len(self.latency)
+            b = sum(y for _, y in self.latency) / len(self.latency)
+            lines.append(f"  page latency per browser: {a:.1f} s fresh → {b:.1f} s before restart")
+        if self.rss:
+            step = max(1, len(self.rss) // 12)      # ~a dozen points over the run
+            pts  = self.rss[::step]
+            lines.append(f"  RSS peak {max(m for *_, m in self.rss):.0f} MB; over time: "
+                         + "  ".join(f"{t:.0f}m w{w} {m:.0f}" for t, w, m in pts))
+        return "\n".join(lines)
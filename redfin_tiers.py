@@ -0,0 +1,112 @@
+"""
+redfin_tiers.py   –   2025-08-07
+Price-ladder ordering from the landing page and running statistics.
+
+The ladder used to be fixed – read the landing page (7 s widget wait),
+second ENTER (10 s url_changes), include=sold – so an off-market home
+paid every dead wait before reaching the tier that works. Now:
+
+    cls = LADDER.classify(driver)                     # home / results / empty
+    tier, price = LADDER.climb(cls, {"search": …, "second_enter": …, "sold": …})
+
+classify() looks only at the URL shape and – off /home/ URLs – asks the
+page for a few markers in one execute_script (no page_source transfer).
+climb() tries the tiers best-first – hit rate per second spent, per
+landing class – and books every attempt, so the order follows the run.
+Priors (the old ladder for property pages) keep the first few addresses
+sensible; every tier is still tried before giving up.
+"""
+
+import threading, time
+
+TIERS = ("search", "second_enter", "sold")
+
+# landing class → tier → (prior hit rate, prior seconds); weight PRIOR_N observations
+PRIORS = {
+    "home":    {"search": (0.9, 2.0), "second_enter": (0.3, 6.0), "sold": (0.2, 6.0)},
+    "results": {"search": (0.1, 1.5), "second_enter": (0.6, 6.0), "sold": (0.3, 6.0)},
+    "empty":   {"search": (0.05, 1.5), "second_enter": (0.1, 6.0), "sold": (0.6, 6.0)},
+}
+PRIOR_N = 2
+
+_HOME_CSS = "[data-testid*='avm-price'], [data-rf-test-id*='avm-price'], .statsValue.price"
+_CARD_CSS = ".HomeCard, [class*='homecardV2'], [class*='bp-Homecard']"
+_MARKERS_JS = """
+return [[...document.scripts].some(s => s.text.indexOf('addressSectionInfo') >= 0 ||
+                                        s.text.indexOf('avmText') >= 0) ||
+        !!document.querySelector(arguments[0]),
+        !!document.querySelector(arguments[1])];
+"""
+
+
+def classify(driver) -> str:
+    """Landing page → 'home' (a property page), 'results' (result cards) or 'empty'."""
+    if "/home/" in driver.current_url:
+        return "home"
+    try:
+        home, cards = driver.execute_script(_MARKERS_JS, _HOME_CSS, _CARD_CSS)
+    except Exception:                               # page mid-navigation → try the ladder as is
+        return "empty"
+    return "home" if home else "results" if cards else "empty"
+
+
+class TierLadder:
+    def __init__(self):
+        self.adaptive = True                        # --fixed-tiers → always TIERS order
+        self._lock  = threading.Lock()
+        self._stats = {c: {t: [0, 0, 0.0] for t in TIERS} for c in PRIORS}  # tries, hits, secs
+        self.addresses = self.skipped = 0
+
+    classify = staticmethod(classify)
+
+    def _score(self, cls, tier):
+        tries, hits, secs = self._stats[cls][tier]
+        p0, c0 = PRIORS[cls][tier]
+        p = (hits + PRIOR_N * p0) / (tries + PRIOR_N)
+        c = (secs + PRIOR_N * c0) / (tries + PRIOR_N)
+        return p / c                                # expected hits per second spent
+
+    def order(self, cls) -> list:
+        if not self.adaptive:
+            return list(TIERS)
+        with self._lock:
+            return sorted(TIERS, key=lambda t: -self._score(cls, t))
+
+    def record(self, cls, tier, hit, secs):
+        with self._lock:
+            st = self._stats[cls][tier]
+            st[0] += 1; st[1] += bool(hit); st[2] += secs
+
+    def climb(self, cls, steps):
+        """Run steps[tier]() best-first until one returns a price → (tier, price) / ('', None)."""
+        tried = []
+        for tier in self.order(cls):
+            t0 = time.perf_counter()
+            price = steps[tier]()
+            self.record(cls, tier, price, time.perf_counter() - t0)
+            tried.append(tier)
+            if price:
+                # fixed-ladder tiers ahead of the winner that never had to run
+                with self._lock:
+                    self.addresses += 1
+                    self.skipped += len(set(TIERS[:TIERS.index(tier)]) - set(tried))
+                return tier, price
+        with self._lock:
+            self.addresses += 1
+        return "", None
+
+    def report(self) -> str:
+        lines = [f"Price tiers ({'adaptive' if self.adaptive else 'fixed'} order): "
+                 f"{self.addresses} addresses, {self.skipped} fallback tiers skipped"]
+        with self._lock:
+            for cls, tiers in self._stats.items():
+                if not any(st[0] for st in tiers.values()):
+                    continue
+                parts = [f"{t} {st[1]}/{st[0]} ({st[2] / st[0]:.1f} s)"
+                         for t, st in tiers.items() if st[0]]
+                order = " > ".join(sorted(TIERS, key=lambda t: -self._score(cls, t)))
+                lines.append(f"  {cls:8} {', '.join(parts)}  → learned order {order}")
+        return "\n".join(lines)
+
+
+LADDER = TierLadder()
@@ -0,0 +1,160 @@
+"""
+redfin_trace.py   –   2025-08-07
+Per-stage timing for the scrape flow.
+
+    with TRACE.span("search"): …      # time a stage of the current address
+    @TRACE.timed("parse")             # … or a whole function
+    TRACE.tier("second_enter")        # which price tier finally worked
+    TRACE.take_tier()                 # … read back (always on) for the results store
+    TRACE.add_bytes(len(src))         # page_source volume
+
+`TRACE.wrap(scrape_fn)` opens one record per address and appends it as a
+JSON line to the --trace file; `TRACE.summary()` gives p50/p95/p99 per
+stage, tier counts and total bytes. Switched off (the default) span()
+hands back one shared no-op context manager, so the cost is a method call.
+"""
+
+import json, math, threading, time
+from collections import Counter, defaultdict
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("rec", "stage", "t0")
+
+    def __init__(self, rec, stage):
+        self.rec, self.stage = rec, stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        st = self.rec["stages"]
+        st[self.stage] = st.get(self.stage, 0.0) + time.perf_counter() - self.t0
+        return False
+
+
+def _pct(sorted_vals, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(p / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+class Tracer:
+    def __init__(self):
+        self.on      = False
+        self._local  = threading.local()
+        self._lock   = threading.Lock()
+        self._out    = None
+        self._stages = defaultdict(list)            # stage → [secs per address]
+        self._tiers  = Counter()
+        self._bytes  = 0
+        self._n      = 0
+
+    def enable(self, path):
+        self._out = open(path, "a", encoding="utf-8")
+        self.on = True
+
+    # ─────────────────────── hot-path API ───────────────────────
+    def _rec(self):
+        return getattr(self._local, "rec", None)
+
+    def span(self, stage):
+        rec = self._rec() if self.on else None
+        return _Span(rec, stage) if rec is not None else _NULL
+
+    def timed(self, stage):
+        """Decorator form of span() for whole-function stages."""
+        def deco(fn):
+            def run(*a, **kw):
+                if not self.on:
+                    return fn(*a, **kw)
+                with self.span(stage):
+                    return fn(*a, **kw)
+            run.__name__, run.__doc__, run.__wrapped__ = fn.__name__, fn.__doc__, fn
+            return run
+        return deco
+
+    def tier(self, name):
+        self._local.tier = name
+        rec = self._rec() if self.on else None
+        if rec is not None:
+            rec["tier"] = name
+
+    def take_tier(self) -> str:
+        """Tier recorded on this thread since the last call ('' if none); resets it."""
+        name, self._local.tier = getattr(self._local, "tier", ""), ""
+        return name
+
+    def add_bytes(self, n):
+        rec = self._rec() if self.on else None
+        if rec is not None:
+            rec["bytes"] += n
+
+    # ─────────────────────── per-address records ───────────────────────
+    def wrap(self, scrape_fn):
+        def run(driver, addr):
+            if not self.on:
+                return scrape_fn(driver, addr)
+            rec = self._local.rec = {"address": addr, "start": time.time(),
+                                     "stages": {}, "tier": "none", "bytes": 0}
+            t0 = time.perf_counter()
+            try:
+                return scrape_fn(driver, addr)
+            except Exception as e:
+                rec["error"] = type(e).__name__
+                raise
+            finally:
+                rec["total"] = time.perf_counter() - t0
+                self._local.rec = None
+                self._finish(rec)
+        return run
+
+    def _finish(self, rec):
+        rec["stages"] = {k: round(v, 4) for k, v in rec["stages"].items()}
+        rec["total"]  = round(rec["total"], 4)
+        line = json.dumps(rec)
+        with self._lock:
+            self._out.write(line + "\n"); self._out.flush()
+            for k, v in rec["stages"].items():
+                self._stages[k].append(v)
+            self._stages["total"].append(rec["total"])
+            self._tiers[rec["tier"]] += 1
+            self._bytes += rec["bytes"]
+            self._n     += 1
+
+    # ─────────────────────────── report ───────────────────────────
+    def summary(self) -> str:
+        if not self.on:
+            return ""
+        lines = [f"Stage timings over {self._n} addresses (seconds):",
+                 f"  {'stage':14} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'sum':>9}"]
+        for stage, vals in sorted(self._stages.items(), key=lambda kv: -sum(kv[1])):
+            v = sorted(vals)
+            lines.append(f"  {stage:14} {len(v):5d} {_pct(v, 50):8.2f} {_pct(v, 95):8.2f} "
+                         f"{_pct(v, 99):8.2f} {sum(v):9.1f}")
+        lines.append("  price tiers: " + ", ".join(f"{k}={n}" for k, n in self._tiers.most_common()))
+        lines.append(f"  page_source pulled: {self._bytes / 1e6:.1f} MB")
+        return "\n".join(lines)
+
+    def close(self):
+        if self._out:
+            self._out.close()
+
+
+TRACE = Tracer()
@@ -0,0 +1,171 @@
+"""
+redfin_writer.py   –   2025-08-07
+Durable CSV output for the appending runner (B2.py), replacing a flush +
+fsync after every row.
+
+    row      write, fsync CSV                            (1 fsync / row)
+    group    buffer; commit every `group_rows` rows or `group_ms` ms
+             (one CSV fsync per group)
+    journal  append the row to <out>.journal and fsync it (1 small fsync / row);
+             the CSV catches up in groups (one more fsync each), and a
+             restart replays whatever the journal holds that the CSV does not
+
+.done is only flushed, never fsynced: the CSV is the source of truth,
+and ProgressIndex re-indexes any priced CSV row .done lost on restart.
+
+A row counts as acknowledged once its policy's fsync has returned; an
+acknowledged row survives a crash. repair_tail() drops a half-written
+last line and ProgressIndex re-indexes CSV rows a crash left out of
+.done. Duplicates are caught on the verbatim address, not the
+normalized key: variants of one property ('12 Main St', '12 Main
+Street') are one scrape fanned out to every original row, and each of
+them gets its own line. The normalized key only decides resume / skip.
+"""
+
+import csv, io, json, os, threading, time
+
+POLICIES = ("row", "group", "journal")
+
+
+def repair_tail(path):
+    """Truncate a torn last line (crash mid-write). Call before ProgressIndex."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        size, pos, step = f.tell(), f.tell(), 4096
+        while pos > 0:
+            pos = max(0, pos - step)
+            f.seek(pos)
+            nl = f.read(size - pos).rfind(b"\n")
+            if nl >= 0:
+                f.truncate(pos + nl + 1)
+                break
+        else:
+            f.truncate(0)
+        f.flush(); os.fsync(f.fileno())
+    print(f"(dropped a partial last line from {path})")
+
+
+def close_run(writer, progress):
+    """Shutdown order: the writer's last commit still marks .done, so it goes first."""
+    if writer:
+        writer.close()
+    progress.close()
+
+
+class DurableWriter:
+    def __init__(self, out_csv, header, progress, policy="row",
+                 group_rows=50, group_ms=1000):
+        if policy not in POLICIES:
+            raise ValueError(f"durability policy must be one of {POLICIES}")
+        self.header, self.progress, self.policy = header, progress, policy
+        self.group_rows, self.group_secs = max(1, group_rows), group_ms / 1000
+        self.journal_path = out_csv + ".journal"
+        self._lock    = threading.Lock()
+        self._pending = []                         # (address, row) not yet in the CSV
+        self._written = set()                      # verbatim addresses in the CSV this run
+        self._oldest  = 0.0
+        self.rows = self.commits = self.fsyncs = self.skipped = self.replayed = 0
+        self.fsync_secs = 0.0
+
+        new = not os.path.exists(out_csv) or os.path.getsize(out_csv) == 0
+        self._f   = open(out_csv, "a", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._f)
+        if new:
+            self._csv.writerow(header); self._sync(self._f)
+        self._journal = None
+        if policy == "journal":
+            self._replay()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+        self._stop  = threading.Event()
+        self._timer = None
+        if policy != "row":                        # commit quiet groups after group_ms
+            self._timer = threading.Thread(target=self._tick, daemon=True)
+            self._timer.start()
+
+    def _sync(self, f):
+        t0 = time.perf_counter()
+        f.flush(); os.fsync(f.fileno())
+        self.fsync_secs += time.perf_counter() - t0
+        self.fsyncs += 1
+
+    # ─────────────────────────── public API ───────────────────────────
+    def write(self, addr, row) -> bool:
+        """Queue one data row (without the address). False → same input address twice."""
+        with self._lock:
+            if addr in self._written:
+                self.skipped += 1
+                return False
+            if self._journal:
+                self._journal.write(json.dumps({"address": addr, "row": row}) + "\n")
+                self._sync(self._journal)
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((addr, row)); self._written.add(addr)
+            self.rows += 1
+            if self.policy == "row" or len(self._pending) >= self.group_rows:
+                self._commit()
+        return True
+
+    def close(self):
+        self._stop.set()
+        if self._timer:
+            self._timer.join()
+        with self._lock:
+            self._commit()
+        self._f.close()
+        if self._journal:
+            self._journal.close()
+
+    def report(self) -> str:
+        return (f"Writer ({self.policy}): {self.rows} rows in {self.commits} commits, "
+                f"{self.fsyncs} fsyncs ({self.fsync_secs:.2f} s), "
+                f"{self.skipped} duplicates skipped, {self.replayed} replayed from journal")
+
+    # ─────────────────────────── internals ───────────────────────────
+    def _commit(self):
+        """CSV (fsynced), then .done (flushed), then the journal. Caller holds the lock."""
+        if not self._pending:
+            return
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        for addr, row in self._pending:
+            w.writerow([addr] + row)
+        self._f.write(buf.getvalue())
+        self._sync(self._f)
+        self.progress.mark_done_many((a for a, _ in self._pending), sync=False)
+        if self._journal:
+            self._journal.truncate(0); self._sync(self._journal)
+        self._pending.clear()
+        self.commits += 1
+
+    def _tick(self):
+        while not self._stop.wait(min(self.group_secs, 0.25) or 0.05):
+            with self._lock:
+                if self._pending and time.monotonic() - self._oldest >= self.group_secs:
+                    self._commit()
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0:
+            return
+        with open(self._f.name, newline="", encoding="utf-8") as f:   # crash after the CSV
+            in_csv = {r[0] for r in csv.reader(f) if r}                # fsync, before truncate
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break                          # torn last record – never acknowledged
+                addr = rec["address"]
+                if addr not in in_csv and addr not in self._written:
+                    self._pending.append((addr, rec["row"])); self._written.add(addr)
+                    self.replayed += 1
+        with self._lock:
+            self._commit()
+        open(self.journal_path, "w").close()
+        if self.replayed:
+            print(f"(replayed {self.replayed} journaled rows into the CSV)")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+reparse.py   –   2025-08-07
+Re-run the current extractors over the page archive and rewrite the CSV –
+no browser, no re-scrape:
+
+    python reparse.py --archive page_archive --out house_details_reparsed.csv
+    python reparse.py --style b2 --workers 8
+
+Streams the archive index through a process pool (imap, chunked) and
+writes rows in archive order – to its own file by default, so the live
+results are never overwritten. --style b2 routes like B2.py: rows
+without a price go to <out>.failed.csv, and facts missing from the page
+JSON come from the archived Public-facts text. Deliberately imports
+nothing from selenium (or the runner scripts, which do), so it starts
+in a blink.
+"""
+
+import argparse, csv, os, sys, time
+from multiprocessing import Pool
+
+from redfin_archive import iter_index, load_page
+from redfin_extract import cell, extract, lot_acres, public_facts
+from redfin_progress import FAILED_HEADER
+
+HEADERS = {
+    "gemini": ["address", "price", "lotSize(acres)", "yearBuilt",
+               "livingArea(sqft)", "bedrooms", "bathrooms"],
+    "b2":     ["address", "price", "lotSize", "yearBuilt",
+               "livingArea", "bedrooms", "bathrooms"],
+}
+
+
+def _row(job):
+    """(root, entry, style) → (CSV row, failed); same formatting and routing as the runners."""
+    root, e, style = job
+    rec = extract(load_page(root, e["sha"]))
+    price = "".join(ch for ch in (rec["price"] or "") if ch.isdigit())
+    if style != "b2":
+        return [e["address"], price] + [cell(v) for v in (
+            lot_acres(rec), rec["yearBuilt"], rec["livingArea"], rec["beds"], rec["baths"])], False
+    d = public_facts({"lotSize":    lot_acres(rec, 3),
+                      "yearBuilt":  rec["yearBuilt"],
+                      "livingArea": rec["livingArea"],
+                      "bedrooms":   rec["beds"],
+                      "bathrooms":  rec["baths"]}, e.get("pf_txt"))
+    facts = [cell(v, "b2") for v in d.values()]
+    if not price:                       # B2 sends these to the retry list, not the CSV
+        return [e["address"], "no price", e.get("fetched_at", ""), ""] + facts, True
+    return [e["address"], price] + facts, False
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline re-parse of archived Redfin pages")
+    ap.add_argument("--archive", default="page_archive")
+    ap.add_argument("--out", default="house_details_reparsed.csv",
+                    help="rewritten from scratch – not the runners' live CSV by default")
+    ap.add_argument("--style", choices=sorted(HEADERS), default="gemini",
+                    help="column layout of redfin-gemini.py or B2.py")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--all-fetches", action="store_true",
+                    help="one row per archived fetch instead of the newest per address")
+    a = ap.parse_args()
+
+    t0, n, nf = time.perf_counter(), 0, 0
+    jobs = ((a.archive, e, a.style) for e in iter_index(a.archive, not a.all_fetches))
+    tmp, failed = a.out + ".tmp", a.out + ".failed.csv"
+    with open(tmp, "w", newline="", encoding="utf-8") as fo, \
+         open(failed + ".tmp", "w", newline="", encoding="utf-8") as ff, Pool(a.workers) as pool:
+        wtr, wtf = csv.writer(fo), csv.writer(ff)
+        wtr.writerow(HEADERS[a.style]); wtf.writerow(FAILED_HEADER)
+        for row, failed_row in pool.imap(_row, jobs, chunksize=64):
+            if failed_row:
+                wtf.writerow(row); nf += 1
+            else:
+                wtr.writerow(row); n += 1
+    os.replace(tmp, a.out)
+    if a.style == "b2":                 # rewritten too – no stale entries from an older run
+        os.replace(failed + ".tmp", failed)
+    else:
+        os.remove(failed + ".tmp")
+
+    dt = time.perf_counter() - t0
+    print(f"re-parsed {n + nf} pages in {dt:.1f} s ({(n + nf) / dt if dt else 0:.0f} pages/s, "
+          f"{a.workers} processes) → {a.out}"
+          + (f" ({nf} without a price → {failed})" if nf else "")
+          + ("  [selenium was imported!]" if "selenium" in sys.modules else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+test_redfin.py   –   2025-08-07
+Offline regression checks – no Chrome, no Redfin:
+
+    python -m pytest -q
+
+Runs the bench's `suite` correctness pass on every page fixture_server.py
+serves and its `durability` kill/resume run, plus address de-dup,
+extract(), the retry classes and the tier ladder on the same corpus.
+"""
+
+import os, subprocess, sys, urllib.request
+from urllib.parse import quote
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+import bench_redfin, fixture_server
+from redfin_address import AddressIndex
+from redfin_extract import extract
+from redfin_retry import RetryQueue
+from redfin_tiers import TIERS, TierLadder
+
+EXPECTED = bench_redfin.load_expected()
+ROUTES   = fixture_server.load_routes()
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = fixture_server.serve(0, background=True)
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown(); srv.server_close()
+
+
+@pytest.fixture(scope="module")
+def runners():
+    return bench_redfin.load_script("B2.py"), bench_redfin.load_script()
+
+
+def get(url) -> (str, str):
+    with urllib.request.urlopen(url, timeout=10) as r:
+        return r.geturl(), r.read().decode("utf-8")
+
+
+# ─────────────────────────── bench checks ───────────────────────────
+@pytest.mark.parametrize("page", sorted(EXPECTED))
+def test_suite_page_matches_expected(server, runners, page):
+    _, src = get(f"{server}/home/x?v={page}")
+    assert bench_redfin._check_page(*runners, src, EXPECTED[page]) == []
+
+
+@pytest.mark.parametrize("route", [r for r in ROUTES.values()
+                                   if r["page"] not in fixture_server.RESULTS_PAGES],
+                         ids=lambda r: r["page"])
+def test_search_lands_on_property_page(server, route):
+    url, src = get(f"{server}/search/{quote(route['address'])}")
+    assert "/home/" in url
+    rec, want = extract(src), EXPECTED[route["page"]]
+    assert "".join(c for c in rec["price"] or "" if c.isdigit()) == want["price"]
+
+
+def test_durability_kill_resume():
+    p = subprocess.run([sys.executable, os.path.join(bench_redfin.HERE, "bench_redfin.py"),
+                        "durability", "--rows", "48", "--group-rows", "8", "--rounds", "1",
+                        "--seed", "0"], capture_output=True, text=True, timeout=300)
+    assert p.returncode == 0, p.stdout + p.stderr
+    assert "✗" not in p.stdout
+
+
+# ─────────────────────────── address de-dup ───────────────────────────
+def _dedupe(addrs):
+    idx, wrote = AddressIndex(), []
+    save = idx.fan_out(lambda a, d: wrote.append(a))
+    for a in idx.stream(addrs):
+        save(a, {"price": "1"})
+    idx.flush(lambda a, d: wrote.append(a))
+    return idx, wrote
+
+
+@pytest.mark.parametrize("addrs", [
+    ["12 Main St", "12 Main Street, Saratoga Springs NY"],
+    ["12 Main Street, Saratoga Springs NY", "12 Main St"],
+    ["12 Main St Saratoga Springs NY 12866", "12 MAIN STREET, Saratoga Springs, NY"],
+])
+def test_variants_scrape_once_and_fan_out(addrs):
+    idx, wrote = _dedupe(addrs)
+    assert idx.scrapes == 1
+    assert sorted(wrote) == sorted(addrs)
+
+
+def test_other_locality_is_another_property():
+    idx, wrote = _dedupe(["12 Main St, Albany NY", "12 Main St, Saratoga Springs NY"])
+    assert idx.scrapes == 2 and len(wrote) == 2
+
+
+# ─────────────────────────── extract ───────────────────────────
+def test_section_gap_falls_back_to_html_not_similar_homes():
+    with open(os.path.join(fixture_server.FIXTURES, "pages", "condo_no_year.html"),
+              encoding="utf-8") as f:
+        rec = extract(f.read())
+    assert rec["yearBuilt"] == 2006                 # visible "Year Built: 2006"
+    assert rec["livingArea"] == 1240                # not the similar home's 2900
+    assert rec["lotSqFt"] is None and rec["lotAcres"] is None
+
+
+def test_no_section_uses_page_wide_keys():
+    rec = extract('<script>{"sqFt":{"value":1500},"yearBuilt":1950,"beds":3}</script>')
+    assert (rec["livingArea"], rec["yearBuilt"], rec["beds"]) == (1500, 1950, 3)
+
+
+# ─────────────────────────── retry classes ───────────────────────────
+class FakeDriver:
+    def __init__(self, url="https://x/city/Saratoga", text=""):
+        self.current_url, self.text = url, text
+
+
+@pytest.mark.parametrize("driver, outcome, cls", [
+    (FakeDriver(), TimeoutException("slow"), "timeout"),
+    (FakeDriver(), ValueError("boom"), "error"),
+    (FakeDriver(text="Please complete the CAPTCHA"), {}, "blocked"),
+    (FakeDriver("https://x/home/1"), {"price": ""}, "parse_miss"),
+    (FakeDriver(), {"price": ""}, "no_result"),
+    (FakeDriver(), {"price": "1"}, None),
+])
+def test_failure_classes(driver, outcome, cls):
+    def scrape(d, addr):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    data = RetryQueue().wrap(scrape, probe=lambda d: d.text)(driver, "a")
+    assert data.get("failure") == cls
+
+
+def test_retry_tail_is_capped():
+    q, saved = RetryQueue(tail_cap=0), []
+    save = q.on_result(lambda a, d: saved.append((a, d["failure"])))
+    for addr in q.feed(["a"]):
+        assert addr == "a"                          # the 900 s retry is never handed out
+        save(addr, {"failure": "no_result"})
+    assert saved == [("a", "no_result")] and q.gave_up["no_result"] == 1
+
+
+# ─────────────────────────── tier ladder ───────────────────────────
+def test_ladder_starts_in_the_old_order_for_property_pages():
+    assert TierLadder().order("home") == list(TIERS)
+
+
+def test_climb_stops_at_the_first_price():
+    ladder, ran = TierLadder(), []
+    steps = {t: (lambda t=t: ran.append(t) or ("$1" if t == "second_enter" else None))
+             for t in TIERS}
+    assert ladder.climb("home", steps) == ("second_enter", "$1")
+    assert ran == ["search", "second_enter"]